@@ -2,13 +2,33 @@
 
 from appstore import BaseApp, run
 
+# Ad and analytics hosts that never contribute to the crawled content
+DEFAULT_BLOCK_PATTERNS = (
+    "*google-analytics.com*,*googletagmanager.com*,*doubleclick.net*,"
+    "*facebook.net*,*hotjar.com*,*segment.io*"
+)
+
 
 class Crawl4AIApp(BaseApp):
     def install(self):
         api_port = self.inputs.integer("api_port", 11235)
         bind_address = self.inputs.string("bind_address", "0.0.0.0")
         max_concurrent = self.inputs.integer("max_concurrent", 5)
+        render_mode = self.inputs.string("render_mode", "auto")
+        workers = self.inputs.integer("workers", 1)
+        postprocess_workers = self.inputs.integer("postprocess_workers", 0)
+        recycle_after = self.inputs.integer("recycle_after", 100)
+        max_queue = self.inputs.integer("max_queue", 20)
+        job_queue_size = self.inputs.integer("job_queue_size", 100)
+        job_ttl = self.inputs.integer("job_result_ttl_sec", 3600)
+        block_resources = self.inputs.string("block_resources", "font,media")
+        block_patterns = self.inputs.string("block_patterns", DEFAULT_BLOCK_PATTERNS)
+        disable_images = self.inputs.boolean("disable_images", True)
+        wait_until = self.inputs.string("wait_until", "domcontentloaded")
+        page_timeout = self.inputs.integer("page_timeout_sec", 60)
         cache_dir = self.inputs.string("cache_dir", "/var/lib/crawl4ai/cache")
+        cache_ttl = self.inputs.integer("cache_ttl_sec", 86400)
+        cache_max_mb = self.inputs.integer("cache_max_mb", 1024)
         headless = self.inputs.boolean("headless", True)
 
         # Install system dependencies
@@ -24,11 +44,12 @@ class Crawl4AIApp(BaseApp):
         # Create app user and directories
         self.create_user("crawl4ai", system=True, home="/opt/crawl4ai")
         self.create_dir(cache_dir)
+        self.create_dir("/var/lib/crawl4ai/jobs")
         self.create_dir("/opt/crawl4ai")
 
         # Install crawl4ai in a venv with API server deps
         self.create_venv("/opt/crawl4ai/venv")
-        self.pip_install("crawl4ai", "fastapi", "uvicorn", venv="/opt/crawl4ai/venv")
+        self.pip_install("crawl4ai", "fastapi", "uvicorn", "aiohttp", venv="/opt/crawl4ai/venv")
 
         # Deploy server and playground files
         self.deploy_provision_file("server.py", "/opt/crawl4ai/server.py")
@@ -37,11 +58,37 @@ class Crawl4AIApp(BaseApp):
         # Set ownership before installing browsers so they land in the right cache
         self.chown("/opt/crawl4ai", "crawl4ai:crawl4ai", recursive=True)
         self.chown(cache_dir, "crawl4ai:crawl4ai", recursive=True)
+        self.chown("/var/lib/crawl4ai/jobs", "crawl4ai:crawl4ai", recursive=True)
 
         # Install Playwright browsers as the crawl4ai user so they go to its home cache
         self.run_command(["su", "-s", "/bin/bash", "crawl4ai", "-c",
                           "/opt/crawl4ai/venv/bin/playwright install chromium"])
 
+        environment = {
+            "CRAWL4AI_API_PORT": str(api_port),
+            "CRAWL4AI_HOST": bind_address,
+            "CRAWL4AI_WORKERS": str(workers),
+            "CRAWL4AI_MAX_CONCURRENT": str(max_concurrent),
+            "CRAWL4AI_RENDER_MODE": render_mode,
+            "CRAWL4AI_RECYCLE_AFTER": str(recycle_after),
+            "CRAWL4AI_MAX_QUEUE": str(max_queue),
+            "CRAWL4AI_JOB_QUEUE_SIZE": str(job_queue_size),
+            "CRAWL4AI_JOB_TTL": str(job_ttl),
+            "CRAWL4AI_JOB_DIR": "/var/lib/crawl4ai/jobs",
+            "CRAWL4AI_BLOCK_RESOURCES": block_resources.replace(" ", ""),
+            "CRAWL4AI_BLOCK_PATTERNS": block_patterns.replace(" ", ""),
+            "CRAWL4AI_DISABLE_IMAGES": str(disable_images).lower(),
+            "CRAWL4AI_WAIT_UNTIL": wait_until,
+            "CRAWL4AI_PAGE_TIMEOUT_MS": str(page_timeout * 1000),
+            "CRAWL4AI_CACHE_DIR": cache_dir,
+            "CRAWL4AI_CACHE_TTL": str(cache_ttl),
+            "CRAWL4AI_CACHE_MAX_MB": str(cache_max_mb),
+            "CRAWL4AI_HEADLESS": str(headless).lower(),
+        }
+        # Unset means one post-processing process per core (split across workers)
+        if postprocess_workers > 0:
+            environment["CRAWL4AI_POSTPROCESS_WORKERS"] = str(postprocess_workers)
+
         # Create systemd service
         self.create_service("crawl4ai",
             exec_start="/opt/crawl4ai/venv/bin/python /opt/crawl4ai/server.py",
@@ -49,13 +96,7 @@ class Crawl4AIApp(BaseApp):
             after="network.target",
             user="crawl4ai",
             working_directory="/opt/crawl4ai",
-            environment={
-                "CRAWL4AI_API_PORT": str(api_port),
-                "CRAWL4AI_HOST": bind_address,
-                "CRAWL4AI_MAX_CONCURRENT": str(max_concurrent),
-                "CRAWL4AI_CACHE_DIR": cache_dir,
-                "CRAWL4AI_HEADLESS": str(headless).lower(),
-            },
+            environment=environment,
             restart="on-failure",
             restart_sec=5,
         )
@@ -1,22 +1,1091 @@
 """Minimal FastAPI server wrapping crawl4ai."""
+import asyncio
+import fnmatch
+import gzip
+import hashlib
+import json
+import math
 import os
-import uvicorn
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel, Field
-from typing import Optional
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
+import re
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from multiprocessing import get_context
+from typing import List, Literal, Optional
+from urllib.parse import parse_qsl, urldefrag, urlencode, urljoin, urlsplit, urlunsplit
 
-app = FastAPI(title="Crawl4AI", version="0.8.0")
+import aiohttp
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, field_validator, model_validator
+from crawl4ai import (AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode,
+                      DefaultMarkdownGenerator, LXMLWebScrapingStrategy)
+from crawl4ai.content_scraping_strategy import ContentScrapingStrategy
+from crawl4ai.markdown_generation_strategy import MarkdownGenerationStrategy
+from crawl4ai.models import Links, MarkdownGenerationResult, Media, ScrapingResult
 
 PLAYGROUND_PATH = os.path.join(os.path.dirname(__file__), "playground.html")
 
+MAX_CONCURRENT = max(1, int(os.getenv("CRAWL4AI_MAX_CONCURRENT", "5")))
+# With several uvicorn workers the browser and CPU budgets are split between them,
+# so the container-wide totals stay at CRAWL4AI_MAX_CONCURRENT and the core count.
+WORKERS = max(1, int(os.getenv("CRAWL4AI_WORKERS", "1")))
+POOL_SIZE = max(1, MAX_CONCURRENT // WORKERS)
+# Proxmox pins a container's cores with a cpuset; os.cpu_count() reports the host's.
+try:
+    CPU_CORES = max(1, len(os.sched_getaffinity(0)))
+except (AttributeError, OSError):
+    CPU_CORES = os.cpu_count() or 1
+POSTPROCESS_WORKERS = int(os.getenv("CRAWL4AI_POSTPROCESS_WORKERS",
+                                    str(max(1, CPU_CORES // WORKERS))))
+RECYCLE_AFTER = max(1, int(os.getenv("CRAWL4AI_RECYCLE_AFTER", "100")))
+MAX_QUEUE = max(0, int(os.getenv("CRAWL4AI_MAX_QUEUE", str(MAX_CONCURRENT * 4))))
+QUEUE_TIMEOUT = float(os.getenv("CRAWL4AI_QUEUE_TIMEOUT", "30"))
+MAX_BATCH_URLS = int(os.getenv("CRAWL4AI_MAX_BATCH_URLS", "10000"))
+HEADLESS = os.getenv("CRAWL4AI_HEADLESS", "true").lower() == "true"
+CACHE_DIR = os.getenv("CRAWL4AI_CACHE_DIR", "/var/lib/crawl4ai/cache")
+CACHE_TTL = float(os.getenv("CRAWL4AI_CACHE_TTL", "86400"))
+CACHE_MAX_MB = float(os.getenv("CRAWL4AI_CACHE_MAX_MB", "1024"))
+CACHE_SWEEP_SEC = float(os.getenv("CRAWL4AI_CACHE_SWEEP_SEC", "60"))
+JOB_QUEUE_SIZE = max(1, int(os.getenv("CRAWL4AI_JOB_QUEUE_SIZE", "100")))
+JOB_TTL = float(os.getenv("CRAWL4AI_JOB_TTL", "3600"))
+SITE_MAX_PAGES = int(os.getenv("CRAWL4AI_SITE_MAX_PAGES", "100000"))
+SITEMAP_MAX_FILES = int(os.getenv("CRAWL4AI_SITEMAP_MAX_FILES", "50"))
+JOB_DIR = os.getenv("CRAWL4AI_JOB_DIR", "/var/lib/crawl4ai/jobs")
+RENDER_MODE = os.getenv("CRAWL4AI_RENDER_MODE", "auto")
+HTTP_TIMEOUT = float(os.getenv("CRAWL4AI_HTTP_TIMEOUT", "15"))
+HTTP_MAX_BYTES = int(os.getenv("CRAWL4AI_HTTP_MAX_BYTES", str(10 * 1024 * 1024)))
+JS_SHELL_MIN_WORDS = int(os.getenv("CRAWL4AI_JS_SHELL_MIN_WORDS", "50"))
+BLOCK_RESOURCES = [t for t in os.getenv("CRAWL4AI_BLOCK_RESOURCES", "font,media").split(",") if t]
+BLOCK_PATTERNS = [p for p in os.getenv("CRAWL4AI_BLOCK_PATTERNS", "").split(",") if p]
+DISABLE_IMAGES = os.getenv("CRAWL4AI_DISABLE_IMAGES", "true").lower() == "true"
+WAIT_UNTIL = os.getenv("CRAWL4AI_WAIT_UNTIL", "domcontentloaded")
+PAGE_TIMEOUT_MS = int(os.getenv("CRAWL4AI_PAGE_TIMEOUT_MS", "60000"))
+USER_AGENT = os.getenv("CRAWL4AI_USER_AGENT",
+                       "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                       "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
 
-class CrawlRequest(BaseModel):
-    url: str
+# CrawlOptions fields that change how a result is fetched but not what it is.
+CACHE_KEY_EXCLUDE = {"bypass_cache", "page_timeout_ms"}
+
+# Playwright request resource types that can be blocked per request.
+RESOURCE_TYPES = {"stylesheet", "image", "media", "font", "script", "texttrack",
+                  "xhr", "fetch", "eventsource", "websocket", "manifest", "other"}
+
+# Error fragments Playwright reports once the underlying Chromium is gone.
+# A crawler that produced one of these is closed instead of returned to the pool.
+BROWSER_CRASH_MARKERS = (
+    "target closed",
+    "browser has been closed",
+    "browser closed",
+    "connection closed",
+    "page crashed",
+)
+
+
+class Counter:
+    """Prometheus counter with an arbitrary label set."""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Prometheus histogram with cumulative buckets per label set."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_labels(key + (('le', f'{bound:g}'),))} {count}")
+            lines.append(f"{self.name}_bucket{_labels(key + (('le', '+Inf'),))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(key)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_labels(key)} {series[-1]}")
+        return lines
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _gauge(name, help_text, value):
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+
+
+def process_rss_bytes(pid="self"):
+    """Resident set size of a process from /proc, 0 if unavailable."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def child_pids(root_pid):
+    """All descendant pids of ``root_pid`` (the Chromium processes of the pool)."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Field 4 is the ppid; the comm field may contain spaces, so split after ')'
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        parents.setdefault(ppid, []).append(int(entry))
+    found, stack = [], [root_pid]
+    while stack:
+        for child in parents.get(stack.pop(), ()):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+HTTP_REQUESTS = Counter("crawl4ai_http_requests_total",
+                        "HTTP requests by route, method and status code.")
+CRAWLS = Counter("crawl4ai_crawls_total",
+                 "Crawls by outcome: success, failed, cache_hit, rejected or error.")
+RENDERS = Counter("crawl4ai_renders_total",
+                  "Pages by render path: http, browser, or browser after an http fallback.")
+COALESCED = Counter("crawl4ai_coalesced_total",
+                    "Crawl requests served by joining an identical in-flight crawl.")
+CRAWL_PHASES = Histogram("crawl4ai_crawl_phase_seconds",
+                         "Crawl latency by phase: acquire, navigation, markdown and total.",
+                         LATENCY_BUCKETS)
+
+
+class PoolExhausted(Exception):
+    """Raised when a request cannot get a browser within the queue limits."""
+
+
+class _PooledCrawler:
+    """A started AsyncWebCrawler plus the bookkeeping the pool needs."""
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.pages = 0
+        self.healthy = True
+
+    def mark_crashed(self):
+        self.healthy = False
+
+
+class BrowserPool:
+    """Fixed-size pool of warm crawl4ai browsers.
+
+    At most ``size`` browsers exist at once. Each request leases one browser
+    exclusively; excess requests wait in a bounded queue and are rejected
+    with PoolExhausted once the queue is full or the wait times out. Jobs and
+    batch crawls are never rejected for load: they wait without a timeout,
+    at most ``max_queue`` of them for a browser and the rest behind those.
+    Browsers are closed and replaced after ``recycle_after`` pages or as soon
+    as they crash.
+    """
+
+    def __init__(self, size, recycle_after, max_queue, queue_timeout, headless=True):
+        self.size = size
+        self.recycle_after = recycle_after
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.headless = headless
+        self._slots = asyncio.Semaphore(size)
+        self._background = asyncio.Semaphore(max(1, max_queue))
+        self._idle = []
+        self._launched = 0
+        self._leased = 0
+        self._waiting = 0
+        self._waiting_background = 0
+        self._recycled = 0
+        self._closing = False
+
+    @property
+    def stats(self):
+        return {
+            "size": self.size,
+            "browsers": self._launched,
+            "leased": self._leased,
+            "idle": len(self._idle),
+            "waiting": self._waiting,
+            "waiting_background": self._waiting_background,
+            "recycled": self._recycled,
+        }
+
+    async def _launch(self):
+        crawler = AsyncWebCrawler(config=BrowserConfig(headless=self.headless))
+        await crawler.start()
+        self._launched += 1
+        return _PooledCrawler(crawler)
+
+    async def _discard(self, pooled):
+        self._launched -= 1
+        self._recycled += 1
+        try:
+            await pooled.crawler.close()
+        except Exception:
+            pass
+
+    async def start(self, warm=1):
+        """Launch ``warm`` browsers up front so the first requests skip startup."""
+        for _ in range(min(warm, self.size)):
+            self._idle.append(await self._launch())
+
+    @property
+    def closing(self):
+        return self._closing
+
+    async def close(self):
+        self._closing = True
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+    @asynccontextmanager
+    async def lease(self, block=False):
+        """Lease a browser for one crawl. Yields a _PooledCrawler.
+
+        With ``block=True`` the caller waits as long as it takes, so jobs and
+        batch pages are not failed for queueing behind interactive requests.
+        Only ``max_queue`` of those waiters contend for a browser at a time;
+        the rest wait their turn behind them, so a large batch cannot push
+        interactive requests to the back of an unbounded line.
+        """
+        if self._closing:
+            raise PoolExhausted("server is shutting down")
+        if not block and self._slots.locked() and \
+                self._waiting - self._waiting_background >= self.max_queue:
+            raise PoolExhausted(f"all {self.size} browsers busy and "
+                                f"{self._waiting - self._waiting_background} requests queued")
+
+        self._waiting += 1
+        self._waiting_background += block
+        try:
+            if block:
+                async with self._background:
+                    await self._slots.acquire()
+            else:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise PoolExhausted(f"no browser available after {self.queue_timeout:g}s")
+        finally:
+            self._waiting -= 1
+            self._waiting_background -= block
+
+        pooled = None
+        try:
+            pooled = self._idle.pop() if self._idle else await self._launch()
+            self._leased += 1
+            try:
+                yield pooled
+            except Exception:
+                pooled.mark_crashed()
+                raise
+            finally:
+                self._leased -= 1
+                pooled.pages += 1
+                if pooled.healthy and pooled.pages < self.recycle_after and not self._closing:
+                    self._idle.append(pooled)
+                else:
+                    await self._discard(pooled)
+        finally:
+            self._slots.release()
+
+
+def normalize_url(url):
+    """Canonical form of a URL for cache keys and de-duplication.
+
+    Lowercases scheme and host, drops default ports and fragments, sorts the
+    query string and gives empty paths a trailing slash. ``raw:`` and
+    ``file://`` URLs are returned unchanged.
+    """
+    if not url.lower().startswith(("http://", "https://")):
+        return url
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        host = f"{parts.username}@{host}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def result_key(url, opts):
+    """Identity of a crawl result: normalized URL plus the options that shape it."""
+    fields = set(CrawlOptions.model_fields) - CACHE_KEY_EXCLUDE
+    payload = json.dumps(opts.model_dump(include=fields), sort_keys=True)
+    return hashlib.sha256(f"{normalize_url(url)}\n{payload}".encode()).hexdigest()
+
+
+class ResultCache:
+    """On-disk cache of crawl results with a TTL and an LRU size bound.
+
+    Each entry is a gzip-compressed JSON file under ``root/<xx>/<key>.json.gz``.
+    The file mtime records when the entry was stored and the atime when it was
+    last read, so the LRU order survives restarts: the in-memory index is
+    rebuilt from a directory scan at startup. Writes go to a temp file and are
+    renamed into place, so readers never see a partial entry.
+    """
+
+    def __init__(self, root, ttl, max_bytes):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._index = OrderedDict()  # key -> size, least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + ".json.gz")
+
+    @property
+    def stats(self):
+        return {
+            "entries": len(self._index),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def load(self):
+        """Rebuild the index from disk, dropping expired and partial entries.
+
+        Runs at startup and then every CACHE_SWEEP_SEC, which also brings in
+        entries written by other uvicorn workers before the size limit is
+        enforced across all of them.
+        """
+        entries = []
+        now = time.time()
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(dirpath, name)
+                if not name.endswith(".json.gz"):
+                    if name.endswith(".tmp"):
+                        self._unlink(path)
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if now - st.st_mtime > self.ttl:
+                    self._unlink(path)
+                    continue
+                entries.append((st.st_atime, name[:-len(".json.gz")], st.st_size))
+        with self._lock:
+            self._index.clear()
+            self._bytes = 0
+            for _, key, size in sorted(entries):
+                self._index[key] = size
+                self._bytes += size
+            self._evict()
+
+    def get(self, key):
+        """Return the stored entry if it exists and has not expired, else None."""
+        path = self._path(key)
+        try:
+            # Entries written by another uvicorn worker are not in our index yet,
+            # so a missing key still costs one stat() before counting as a miss.
+            st = os.stat(path)
+            if time.time() - st.st_mtime > self.ttl:
+                raise FileNotFoundError(path)
+            with open(path, "rb") as f:
+                entry = json.loads(gzip.decompress(f.read()))
+            os.utime(path, (time.time(), st.st_mtime))
+        except (OSError, ValueError):
+            self._drop(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            if key not in self._index:
+                self._index[key] = st.st_size
+                self._bytes += st.st_size
+            self._index.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        data = gzip.compress(json.dumps(entry).encode(), compresslevel=6)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._bytes += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._evict()
+
+    def _drop(self, key):
+        with self._lock:
+            self._bytes -= self._index.pop(key, 0)
+        self._unlink(self._path(key))
+
+    def _evict(self):
+        # Caller holds self._lock
+        while self._bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self._unlink(self._path(key))
+
+    @staticmethod
+    def _unlink(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one underlying call.
+
+    The first caller starts the work; callers arriving while it runs await
+    the same task. The task is shielded, so a caller that disconnects does
+    not cancel the crawl for the others.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key, fn):
+        """Return ``(result, shared)``; ``shared`` is True for joined calls."""
+        task = self._inflight.get(key)
+        if task is not None:
+            return await asyncio.shield(task), True
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task), False
+
+
+class QueueFull(Exception):
+    """Raised when the job queue has no room; carries a Retry-After estimate."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"job queue full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Job:
+    def __init__(self, request):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.task = None
+
+
+class JobQueue:
+    """Bounded queue of crawl jobs served by ``workers`` background tasks.
+
+    submit() never waits: it raises QueueFull once ``max_queued`` jobs are
+    pending. Finished jobs stay readable for ``ttl`` seconds before the
+    janitor drops them.
+
+    With ``state_dir`` set (several uvicorn workers) every status change is
+    mirrored to ``<state_dir>/<id>.json`` so any worker can answer GET, and a
+    DELETE on a worker that does not own the job leaves an ``<id>.cancel``
+    marker that the owning worker picks up.
+    """
+
+    def __init__(self, workers, max_queued, ttl, state_dir=None):
+        self.workers = workers
+        self.ttl = ttl
+        self.state_dir = state_dir
+        self._queue = asyncio.Queue(maxsize=max_queued)
+        self._jobs = {}
+        self._tasks = []
+        self._avg_duration = 5.0
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    @property
+    def stats(self):
+        counts = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"queued": self.depth, "max_queued": self._queue.maxsize, "jobs": counts}
+
+    def retry_after(self):
+        """Seconds until a queue slot is likely to free up, from recent job durations."""
+        return max(1, min(300, math.ceil(self._avg_duration * max(1, self.depth) / self.workers)))
+
+    def submit(self, request):
+        job = Job(request)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(self.retry_after())
+        self._jobs[job.id] = job
+        self._persist(job)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def load_status(self, job_id):
+        """Status of a job owned by another worker, as a dict, or None."""
+        if not self.state_dir or not re.fullmatch(r"[0-9a-f]{32}", job_id):
+            return None
+        try:
+            with open(os.path.join(self.state_dir, job_id + ".json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def cancel(self, job):
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished = time.time()
+            self._persist(job)
+        elif job.status == "running" and job.task is not None:
+            job.task.cancel()
+
+    def request_cancel(self, job_id):
+        """Ask the worker that owns ``job_id`` to cancel it; returns its status or None."""
+        status = self.load_status(job_id)
+        if status is not None and status["status"] in ("queued", "running"):
+            open(os.path.join(self.state_dir, job_id + ".cancel"), "w").close()
+        return status
+
+    def _persist(self, job):
+        if not self.state_dir:
+            return
+        path = os.path.join(self.state_dir, job.id + ".json")
+        with open(path + ".tmp", "w") as f:
+            f.write(JobStatus.of(job).model_dump_json())
+        os.replace(path + ".tmp", path)
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._janitor()))
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            if job.status != "queued":
+                continue
+            job.status = "running"
+            job.started = time.time()
+            self._persist(job)
+            job.task = asyncio.create_task(
+                crawl_one(normalize_scheme(job.request.url), job.request, block=True))
+            try:
+                job.result = await job.task
+                job.status = "done"
+            except asyncio.CancelledError:
+                job.status = "cancelled"
+                if asyncio.current_task().cancelling():
+                    raise  # server shutdown, not a DELETE
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished = time.time()
+                job.task = None
+                await asyncio.to_thread(self._persist, job)
+            self._avg_duration = 0.8 * self._avg_duration + 0.2 * (job.finished - job.started)
+
+    async def _janitor(self):
+        interval = 1.0 if self.state_dir else min(60.0, self.ttl)
+        last_sweep = time.time()
+        while True:
+            await asyncio.sleep(interval)
+            if self.state_dir:
+                self._apply_cancel_markers()
+            if time.time() - last_sweep < min(60.0, self.ttl):
+                continue
+            last_sweep = time.time()
+            cutoff = last_sweep - self.ttl
+            for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+                del self._jobs[job_id]
+            if self.state_dir:
+                await asyncio.to_thread(self._sweep_state, cutoff)
+
+    def _apply_cancel_markers(self):
+        for job in list(self._jobs.values()):
+            marker = os.path.join(self.state_dir, job.id + ".cancel")
+            if job.status in ("queued", "running") and os.path.exists(marker):
+                self.cancel(job)
+                ResultCache._unlink(marker)
+
+    def _sweep_state(self, cutoff):
+        for name in os.listdir(self.state_dir):
+            path = os.path.join(self.state_dir, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.unlink(path)
+            except OSError:
+                pass
+
+
+class FetchError(Exception):
+    """The HTTP fast path could not produce HTML for this URL."""
+
+
+# Markers of pages whose content only exists after JavaScript runs.
+_SPA_MOUNT = re.compile(
+    r"<div[^>]+id=[\"'](?:root|app|__next|__nuxt|svelte|main-app)[\"'][^>]*>\s*</div>", re.I)
+_NOSCRIPT_JS = re.compile(r"<noscript[^>]*>[^<]*(?:<[^/][^>]*>[^<]*)*?(?:enable|requires?)\s+javascript",
+                          re.I)
+_INVISIBLE = re.compile(r"<(script|style|noscript|template|svg)\b.*?</\1\s*>", re.I | re.S)
+_TAG = re.compile(r"<[^>]+>")
+
+
+def looks_like_js_shell(html):
+    """Heuristic: True when static HTML is an app shell that needs a browser.
+
+    Flags pages with fewer than JS_SHELL_MIN_WORDS visible words, an empty
+    SPA mount point, or a <noscript> asking the visitor to enable JavaScript.
+    """
+    if _SPA_MOUNT.search(html) or _NOSCRIPT_JS.search(html):
+        return True
+    body_start = html.lower().find("<body")
+    text = _TAG.sub(" ", _INVISIBLE.sub(" ", html[body_start if body_start >= 0 else 0:]))
+    return len(text.split()) < JS_SHELL_MIN_WORDS
+
+
+def postprocess_html(html, url, word_count_threshold=10, css_selector=None):
+    """Turn raw HTML into cleaned HTML and markdown with crawl4ai's own pipeline.
+
+    Runs in the postprocess worker processes, so it takes and returns only
+    plain data and keeps the CPU-heavy work off the event loop.
+    """
+    scraped = LXMLWebScrapingStrategy().scrap(
+        url, html, word_count_threshold=word_count_threshold, css_selector=css_selector)
+    cleaned_html = scraped.cleaned_html
+    markdown = DefaultMarkdownGenerator().generate_markdown(cleaned_html, base_url=url)
+    links = [link.href for link in scraped.links.internal + scraped.links.external if link.href]
+    return {"markdown": markdown.raw_markdown, "cleaned_html": cleaned_html, "links": links}
+
+
+async def run_postprocess(html, url, opts):
+    if postprocess_pool is None:
+        return postprocess_html(html, url, opts.word_count_threshold, opts.css_selector)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(postprocess_pool, postprocess_html,
+                                      html, url, opts.word_count_threshold, opts.css_selector)
+
+
+class RawHTMLScraping(ContentScrapingStrategy):
+    """Scraping strategy that leaves the page untouched.
+
+    The browser path only needs the rendered HTML; cleaning and markdown
+    generation happen afterwards in run_postprocess().
+    """
+
+    def scrap(self, url, html, **kwargs):
+        return ScrapingResult(cleaned_html=html, success=True, media=Media(), links=Links(), metadata={})
+
+    async def ascrap(self, url, html, **kwargs):
+        return self.scrap(url, html, **kwargs)
+
+
+def make_route_hook(opts):
+    """Build an on_page_context_created hook that aborts unwanted requests.
+
+    Returns None when the options block nothing, so no route is installed
+    and requests skip the extra round trip through Python.
+    """
+    types = set(opts.block_resources or ())
+    if opts.disable_images:
+        types.add("image")
+    patterns = opts.block_patterns or ()
+    if not types and not patterns:
+        return None
+    url_re = re.compile("|".join(fnmatch.translate(p) for p in patterns)) if patterns else None
+
+    async def handle(route):
+        request = route.request
+        if request.resource_type in types or (url_re and url_re.match(request.url)):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def hook(page, context=None, **kwargs):
+        await page.route("**/*", handle)
+        return page
+
+    return hook
+
+
+class NoMarkdown(MarkdownGenerationStrategy):
+    """Markdown generator that skips the library's in-loop markdown pass."""
+
+    def generate_markdown(self, input_html, *args, **kwargs):
+        return MarkdownGenerationResult(raw_markdown="", markdown_with_citations="",
+                                        references_markdown="")
+
+
+class HttpFetcher:
+    """Shared aiohttp session for the browserless fetch path."""
+
+    def __init__(self, timeout, max_bytes):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self._session = None
+
+    async def start(self):
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"},
+        )
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+
+    async def fetch(self, url, timeout=None):
+        """Return the HTML for ``url``; raises FetchError for non-HTML or bad status."""
+        if url.startswith("raw:"):
+            return url[len("raw:"):]
+        body, ctype, charset = await self._get(url, timeout)
+        if "html" not in ctype:
+            raise FetchError(f"unsupported content type {ctype}")
+        return body.decode(charset or "utf-8", errors="replace")
+
+    async def fetch_sitemap(self, url):
+        """Return the raw (gunzipped) bytes of a sitemap or sitemap index."""
+        body, _, _ = await self._get(url)
+        if body[:2] == b"\x1f\x8b":
+            body = gzip.decompress(body)
+        return body
+
+    async def _get(self, url, timeout=None):
+        """(body, content type, charset) of the whole response.
+
+        Raises FetchError rather than return a truncated body when it is
+        larger than max_bytes, so auto mode falls back to the browser and
+        nothing partial is cached.
+        """
+        too_large = FetchError(f"response larger than {self.max_bytes} bytes")
+        if url.startswith("file://"):
+            try:
+                with open(url[len("file://"):], "rb") as f:
+                    body = f.read(self.max_bytes + 1)
+            except OSError as e:
+                raise FetchError(str(e))
+            if len(body) > self.max_bytes:
+                raise too_large
+            ctype = "text/xml" if url.endswith((".xml", ".xml.gz")) else "text/html"
+            return body, ctype, None
+        try:
+            timeout = aiohttp.ClientTimeout(total=min(timeout or self.timeout, self.timeout))
+            async with self._session.get(url, allow_redirects=True, timeout=timeout) as resp:
+                if resp.status >= 400:
+                    raise FetchError(f"HTTP {resp.status}")
+                ctype = resp.headers.get("Content-Type", "text/html").lower()
+                if (resp.content_length or 0) > self.max_bytes:
+                    raise too_large
+                # content.read(n) returns what is buffered, not n bytes: read to EOF
+                chunks, size = [], 0
+                async for chunk in resp.content.iter_chunked(1 << 16):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise too_large
+                    chunks.append(chunk)
+                return b"".join(chunks), ctype, resp.charset
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise FetchError(str(e) or type(e).__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+
+    Sized for ``capacity`` items at the given false-positive rate; at 100k
+    URLs and 0.1% that is about 180 KB, versus tens of MB for a set of URLs.
+    A false positive only means a page is skipped, never crawled twice.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        """Add ``item``; returns False if it was (probably) already present."""
+        new = False
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                new = True
+        return new
+
+
+# Links to these are never pages worth converting to markdown.
+SKIP_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".bmp", ".tif", ".tiff",
+    ".mp3", ".mp4", ".avi", ".mov", ".webm", ".ogg", ".wav", ".flac",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".tar", ".iso", ".dmg", ".exe",
+    ".css", ".js", ".json", ".woff", ".woff2", ".ttf", ".eot", ".pdf",
+)
+
+
+class UrlFrontier:
+    """Breadth-first queue of URLs still to crawl within a site's limits.
+
+    URLs are normalized before the seen-check, and seen URLs are remembered
+    only in a Bloom filter, so memory grows with the pending queue rather
+    than with every link ever discovered. At most ``max_pages`` URLs are
+    ever admitted.
+    """
+
+    def __init__(self, max_pages, max_depth, allowed_domains, include_paths=None,
+                 exclude_patterns=None):
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.allowed_domains = [d.lower().lstrip(".") for d in allowed_domains]
+        self.include_paths = include_paths or []
+        self._exclude = (re.compile("|".join(fnmatch.translate(p) for p in exclude_patterns))
+                         if exclude_patterns else None)
+        self._seen = BloomFilter(max_pages * 4)
+        self._queue = deque()
+        self.admitted = 0
+
+    def __len__(self):
+        return len(self._queue)
+
+    def in_scope(self, url):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") and not url.startswith("file://"):
+            return False
+        host = (parts.hostname or "").lower()
+        if parts.scheme in ("http", "https") and not any(
+                host == d or host.endswith("." + d) for d in self.allowed_domains):
+            return False
+        path = parts.path or "/"
+        if path.lower().endswith(SKIP_EXTENSIONS):
+            return False
+        if self.include_paths and not any(path.startswith(p) for p in self.include_paths):
+            return False
+        return not (self._exclude and self._exclude.match(url))
+
+    def add(self, url, depth, base=None):
+        """Queue ``url`` (resolved against ``base``) if new and within limits."""
+        if depth > self.max_depth or self.admitted >= self.max_pages:
+            return False
+        if base:
+            url = urljoin(base, url)
+        url = normalize_url(urldefrag(url)[0])
+        if not self.in_scope(url) or not self._seen.add(url):
+            return False
+        self._queue.append((url, depth))
+        self.admitted += 1
+        return True
+
+    def pop(self):
+        return self._queue.popleft()
+
+
+def parse_sitemap(data):
+    """Split a sitemap document into (page URLs, nested sitemap URLs)."""
+    pages, sitemaps = [], []
+    try:
+        root = ET.fromstring(data)
+    except ET.ParseError:
+        return pages, sitemaps
+    is_index = root.tag.endswith("sitemapindex")
+    for loc in root.iter():
+        if loc.tag.endswith("loc") and loc.text:
+            (sitemaps if is_index else pages).append(loc.text.strip())
+    return pages, sitemaps
+
+
+pool = BrowserPool(
+    size=POOL_SIZE,
+    recycle_after=RECYCLE_AFTER,
+    max_queue=MAX_QUEUE,
+    queue_timeout=QUEUE_TIMEOUT,
+    headless=HEADLESS,
+)
+flights = SingleFlight()
+fetcher = HttpFetcher(HTTP_TIMEOUT, HTTP_MAX_BYTES)
+jobs = JobQueue(workers=POOL_SIZE, max_queued=JOB_QUEUE_SIZE, ttl=JOB_TTL,
+                state_dir=JOB_DIR if WORKERS > 1 else None)
+postprocess_pool = None
+cache = ResultCache(CACHE_DIR, CACHE_TTL, int(CACHE_MAX_MB * 1024 * 1024)) if CACHE_MAX_MB > 0 else None
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global postprocess_pool
+    if POSTPROCESS_WORKERS > 0:
+        # spawn, not fork: the parent holds an event loop and Chromium pipes
+        postprocess_pool = ProcessPoolExecutor(max_workers=POSTPROCESS_WORKERS,
+                                               mp_context=get_context("spawn"))
+    if jobs.state_dir:
+        os.makedirs(jobs.state_dir, exist_ok=True)
+    sweeper = None
+    if cache:
+        await asyncio.to_thread(cache.load)
+        sweeper = asyncio.create_task(sweep_cache())
+    await fetcher.start()
+    await pool.start()
+    jobs.start()
+    try:
+        yield
+    finally:
+        await jobs.close()
+        await pool.close()
+        await fetcher.close()
+        if sweeper:
+            sweeper.cancel()
+        if postprocess_pool:
+            postprocess_pool.shutdown(cancel_futures=True)
+
+
+async def sweep_cache():
+    while True:
+        await asyncio.sleep(CACHE_SWEEP_SEC)
+        await asyncio.to_thread(cache.load)
+
+
+app = FastAPI(title="Crawl4AI", version="0.8.0", lifespan=lifespan)
+
+
+class CrawlOptions(BaseModel):
+    render_mode: Optional[Literal["http", "browser", "auto"]] = Field(
+        default=None,
+        description="http: plain fetch, browser: headless Chromium, "
+                    "auto: http first and browser only for JS-rendered pages. "
+                    "Defaults to CRAWL4AI_RENDER_MODE.")
     word_count_threshold: int = Field(default=10)
     bypass_cache: bool = Field(default=False)
     css_selector: Optional[str] = None
+    block_resources: Optional[List[str]] = Field(
+        default=None,
+        description="Browser resource types to abort, e.g. image, font, media, stylesheet. "
+                    "Defaults to CRAWL4AI_BLOCK_RESOURCES.")
+    block_patterns: Optional[List[str]] = Field(
+        default=None,
+        description="Glob patterns of request URLs to abort, e.g. *doubleclick.net*. "
+                    "Defaults to CRAWL4AI_BLOCK_PATTERNS.")
+    disable_images: Optional[bool] = Field(
+        default=None, description="Abort all image requests. Defaults to CRAWL4AI_DISABLE_IMAGES.")
+    wait_until: Optional[Literal["commit", "domcontentloaded", "load", "networkidle"]] = Field(
+        default=None, description="Navigation wait strategy. Defaults to CRAWL4AI_WAIT_UNTIL.")
+    page_timeout_ms: Optional[int] = Field(
+        default=None, ge=1000, le=600000,
+        description="Hard limit for loading one page. Defaults to CRAWL4AI_PAGE_TIMEOUT_MS.")
+
+    @field_validator("block_resources")
+    @classmethod
+    def _known_resource_types(cls, value):
+        unknown = set(value or ()) - RESOURCE_TYPES
+        if unknown:
+            raise ValueError(f"unknown resource types: {', '.join(sorted(unknown))}")
+        return value
+
+    def resolved(self):
+        """Copy with every unset option replaced by the server default."""
+        defaults = {
+            "render_mode": RENDER_MODE,
+            "block_resources": BLOCK_RESOURCES,
+            "block_patterns": BLOCK_PATTERNS,
+            "disable_images": DISABLE_IMAGES,
+            "wait_until": WAIT_UNTIL,
+            "page_timeout_ms": PAGE_TIMEOUT_MS,
+        }
+        return self.model_copy(update={k: v for k, v in defaults.items() if getattr(self, k) is None})
+
+
+class CrawlRequest(CrawlOptions):
+    url: str
+
+
+class BatchCrawlRequest(BaseModel):
+    urls: List[str] = Field(min_length=1, max_length=MAX_BATCH_URLS)
+    options: CrawlOptions = Field(default_factory=CrawlOptions)
+
+
+class SiteCrawlRequest(BaseModel):
+    url: Optional[str] = Field(default=None, description="Seed page to start from.")
+    sitemap: Optional[str] = Field(default=None, description="sitemap.xml (or index) to seed from.")
+    max_depth: int = Field(default=2, ge=0, le=20)
+    max_pages: int = Field(default=100, ge=1, le=SITE_MAX_PAGES)
+    allowed_domains: Optional[List[str]] = Field(
+        default=None, description="Hosts (and their subdomains) to stay on. Defaults to the seed host.")
+    include_paths: Optional[List[str]] = Field(
+        default=None, description="Only crawl URL paths starting with one of these prefixes.")
+    exclude_patterns: Optional[List[str]] = Field(
+        default=None, description="Glob patterns of URLs to skip.")
+    per_host_concurrency: int = Field(default=2, ge=1, le=32)
+    include_links: bool = Field(default=False, description="Include discovered links in each result.")
+    options: CrawlOptions = Field(default_factory=CrawlOptions)
+
+    @model_validator(mode="after")
+    def _needs_seed(self):
+        if not self.url and not self.sitemap:
+            raise ValueError("either url or sitemap is required")
+        return self
 
 
 class CrawlResponse(BaseModel):
@@ -25,39 +1094,389 @@ class CrawlResponse(BaseModel):
     markdown: Optional[str] = None
     cleaned_html: Optional[str] = None
     error: Optional[str] = None
+    render_mode: Optional[str] = None
+    links: Optional[List[str]] = None
+    cache: Optional[str] = None
+    coalesced: bool = False
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str
+    url: str
+    created: float
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: Optional[CrawlResponse] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def of(cls, job):
+        return cls(job_id=job.id, status=job.status, url=job.request.url,
+                   created=job.created, started=job.started, finished=job.finished,
+                   result=job.result, error=job.error)
+
+
+def normalize_scheme(url):
+    url = url.strip()
+    if not url.startswith(("http://", "https://", "file://", "raw:")):
+        url = "https://" + url
+    return url
+
+
+async def crawl_one(url, opts, block=False):
+    """Crawl a URL through the cache and record outcome and total latency."""
+    start = time.perf_counter()
+    opts = opts.resolved()
+    try:
+        resp = await crawl_cached(url, opts, block)
+    except PoolExhausted:
+        CRAWLS.inc(outcome="rejected")
+        raise
+    except Exception:
+        CRAWLS.inc(outcome="error")
+        raise
+    CRAWL_PHASES.observe(time.perf_counter() - start, phase="total")
+    if resp.cache == "hit":
+        CRAWLS.inc(outcome="cache_hit")
+    else:
+        CRAWLS.inc(outcome="success" if resp.success else "failed")
+    return resp
+
+
+async def crawl_cached(url, opts, block=False):
+    """Serve a URL from the result cache, or crawl it and store the result.
+
+    Identical concurrent misses share one crawl through ``flights``; joined
+    responses have ``coalesced`` set. ``cache`` on the response is "hit",
+    "miss" or "bypass", and stays None when the server cache is disabled.
+    A blocking caller that joined an interactive crawl which was turned away
+    by the pool crawls again on its own terms instead of sharing the failure.
+    """
+    key = result_key(url, opts)
+    if cache is not None and not opts.bypass_cache:
+        entry = cache.get(key)
+        if entry is not None:
+            return CrawlResponse(**entry, cache="hit")
+    while True:
+        try:
+            resp, shared = await flights.do(key, lambda: crawl_and_store(key, url, opts, block))
+            break
+        except PoolExhausted:
+            if not block or pool.closing:
+                raise
+    if shared:
+        COALESCED.inc()
+    update = {"coalesced": shared}
+    if cache is not None:
+        update["cache"] = "bypass" if opts.bypass_cache else "miss"
+    return resp.model_copy(update=update)
+
+
+async def crawl_and_store(key, url, opts, block=False):
+    resp = await crawl_rendered(url, opts, block)
+    if cache is not None and resp.success:
+        await asyncio.to_thread(cache.put, key, resp.model_dump(exclude={"cache", "coalesced"}))
+    return resp
+
+
+async def crawl_rendered(url, opts, block=False):
+    """Dispatch a crawl to the HTTP fast path, the browser, or both (auto)."""
+    if opts.render_mode == "browser":
+        RENDERS.inc(path="browser")
+        return await crawl_browser(url, opts, block)
+    try:
+        resp = await crawl_http(url, opts)
+        RENDERS.inc(path="http")
+        return resp
+    except FetchError as e:
+        if opts.render_mode == "http":
+            RENDERS.inc(path="http")
+            return CrawlResponse(url=url, success=False, error=str(e), render_mode="http")
+    RENDERS.inc(path="browser_fallback")
+    return await crawl_browser(url, opts, block)
+
+
+async def crawl_http(url, opts):
+    """Fetch without a browser. In auto mode raises FetchError for JS shells."""
+    t0 = time.perf_counter()
+    html = await fetcher.fetch(url, timeout=opts.page_timeout_ms / 1000)
+    t1 = time.perf_counter()
+    CRAWL_PHASES.observe(t1 - t0, phase="navigation")
+    if opts.render_mode == "auto" and looks_like_js_shell(html):
+        raise FetchError("page needs JavaScript")
+    out = await run_postprocess(html, url, opts)
+    CRAWL_PHASES.observe(time.perf_counter() - t1, phase="markdown")
+    return CrawlResponse(url=url, success=True, render_mode="http", **out)
+
+
+async def crawl_browser(url, opts, block=False):
+    """Render a URL on a pooled browser, then post-process it out of the loop."""
+    # With the server cache enabled the library cache is skipped so results
+    # live in one place with a TTL and size limit we control.
+    if cache is not None or opts.bypass_cache:
+        cache_mode = CacheMode.BYPASS
+    else:
+        cache_mode = CacheMode.ENABLED
+    run_cfg = CrawlerRunConfig(
+        cache_mode=cache_mode,
+        scraping_strategy=RawHTMLScraping(),
+        markdown_generator=NoMarkdown(),
+        wait_until=opts.wait_until,
+        page_timeout=opts.page_timeout_ms,
+    )
+    t0 = time.perf_counter()
+    async with pool.lease(block=block) as pooled:
+        t1 = time.perf_counter()
+        CRAWL_PHASES.observe(t1 - t0, phase="acquire")
+        # The lease is exclusive, so the per-request hook cannot leak into other crawls
+        pooled.crawler.crawler_strategy.set_hook("on_page_context_created", make_route_hook(opts))
+        result = await pooled.crawler.arun(url=url, config=run_cfg)
+        CRAWL_PHASES.observe(time.perf_counter() - t1, phase="navigation")
+        if not result.success and any(
+                m in (result.error_message or "").lower() for m in BROWSER_CRASH_MARKERS):
+            pooled.mark_crashed()
+    if not result.success:
+        return CrawlResponse(url=url, success=False, error=result.error_message,
+                             render_mode="browser")
+    t2 = time.perf_counter()
+    out = await run_postprocess(result.html or "", url, opts)
+    CRAWL_PHASES.observe(time.perf_counter() - t2, phase="markdown")
+    return CrawlResponse(url=url, success=True, render_mode="browser", **out)
+
+
+async def as_completed_bounded(items, worker, limit):
+    """Run ``worker(item)`` for every item with at most ``limit`` in flight.
+
+    Yields results in completion order. Items are pulled from the iterator
+    lazily, so only ``limit`` tasks and their results are held at a time.
+    Pending tasks are cancelled if the consumer stops early.
+    """
+    items = iter(items)
+    pending = set()
+    try:
+        for item in items:
+            pending.add(asyncio.ensure_future(worker(item)))
+            if len(pending) >= limit:
+                break
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+            for item in items:
+                pending.add(asyncio.ensure_future(worker(item)))
+                if len(pending) >= limit:
+                    break
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+@app.middleware("http")
+async def count_requests(request: Request, call_next):
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    except Exception:
+        status = 500
+        raise
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUESTS.inc(route=getattr(route, "path", "unmatched"),
+                          method=request.method, status=str(status))
+    return response
 
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "pool": pool.stats,
+        "jobs": jobs.stats,
+        "cache": cache.stats if cache else None,
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request, latency, pool and cache metrics."""
+    stats = pool.stats
+    lines = HTTP_REQUESTS.render() + CRAWLS.render() + RENDERS.render() + COALESCED.render()
+    lines += CRAWL_PHASES.render()
+    lines += _gauge("crawl4ai_inflight_crawls", "Distinct crawls currently in flight.", len(flights))
+    lines += _gauge("crawl4ai_pool_size", "Maximum number of pooled browsers.", stats["size"])
+    lines += _gauge("crawl4ai_browsers_active", "Browsers currently running.", stats["browsers"])
+    lines += _gauge("crawl4ai_browsers_leased", "Browsers currently serving a crawl.", stats["leased"])
+    lines += _gauge("crawl4ai_pool_queue_depth", "Requests waiting for a pooled browser.", stats["waiting"])
+    lines += _gauge("crawl4ai_pool_background_queue_depth",
+                    "Job and batch crawls waiting for a pooled browser.", stats["waiting_background"])
+    lines += [
+        "# HELP crawl4ai_browsers_recycled_total Browsers closed after reaching the page limit or crashing.",
+        "# TYPE crawl4ai_browsers_recycled_total counter",
+        f"crawl4ai_browsers_recycled_total {stats['recycled']}",
+    ]
+    lines += _gauge("crawl4ai_job_queue_depth", "Jobs waiting in the asynchronous job queue.", jobs.depth)
+    if cache:
+        cs = cache.stats
+        lookups = cs["hits"] + cs["misses"]
+        lines += [
+            "# HELP crawl4ai_cache_lookups_total Result cache lookups by result.",
+            "# TYPE crawl4ai_cache_lookups_total counter",
+            f'crawl4ai_cache_lookups_total{{result="hit"}} {cs["hits"]}',
+            f'crawl4ai_cache_lookups_total{{result="miss"}} {cs["misses"]}',
+        ]
+        lines += _gauge("crawl4ai_cache_hit_ratio", "Cache hits divided by lookups since start.",
+                        f"{cs['hits'] / lookups:.6f}" if lookups else "0")
+        lines += _gauge("crawl4ai_cache_bytes", "Bytes stored in the result cache.", cs["bytes"])
+        lines += _gauge("crawl4ai_cache_entries", "Entries stored in the result cache.", cs["entries"])
+    pid = os.getpid()
+    browser_rss = sum(process_rss_bytes(p) for p in child_pids(pid))
+    lines += _gauge("process_resident_memory_bytes", "Resident memory of the server process.",
+                    process_rss_bytes())
+    lines += _gauge("crawl4ai_browser_resident_memory_bytes",
+                    "Resident memory of all browser child processes.", browser_rss)
+    return PlainTextResponse("\n".join(lines) + "\n",
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.post("/crawl", response_model=CrawlResponse)
-async def crawl(req: CrawlRequest):
+async def crawl(req: CrawlRequest, response: Response):
     try:
-        url = req.url.strip()
-        if not url.startswith(("http://", "https://", "file://", "raw:")):
-            url = "https://" + url
-        req.url = url
-        browser_cfg = BrowserConfig(headless=os.getenv("CRAWL4AI_HEADLESS", "true").lower() == "true")
-        run_cfg = CrawlerRunConfig(
-            word_count_threshold=req.word_count_threshold,
-            cache_mode=CacheMode.BYPASS if req.bypass_cache else CacheMode.ENABLED,
-            css_selector=req.css_selector,
-        )
-        async with AsyncWebCrawler(config=browser_cfg) as crawler:
-            result = await crawler.arun(url=req.url, config=run_cfg)
-            return CrawlResponse(
-                url=req.url,
-                success=result.success,
-                markdown=result.markdown.raw_markdown if result.markdown else None,
-                cleaned_html=result.cleaned_html,
-                error=result.error_message if not result.success else None,
-            )
+        resp = await crawl_one(normalize_scheme(req.url), req)
+        if resp.cache:
+            response.headers["X-Cache"] = resp.cache.upper()
+        return resp
+    except PoolExhausted as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/crawl/batch")
+async def crawl_batch(req: BatchCrawlRequest):
+    """Crawl many URLs and stream one CrawlResponse per line (NDJSON).
+
+    Lines are written in completion order as soon as each page finishes, so
+    clients can start indexing before the slowest page is done. Pages that
+    need a browser queue for one rather than fail when the pool is busy.
+    """
+
+    async def worker(url):
+        url = normalize_scheme(url)
+        try:
+            return await crawl_one(url, req.options, block=True)
+        except Exception as e:
+            return CrawlResponse(url=url, success=False, error=str(e))
+
+    async def stream():
+        async for resp in as_completed_bounded(req.urls, worker, pool.size):
+            yield resp.model_dump_json() + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/site")
+async def crawl_site(req: SiteCrawlRequest):
+    """Crawl a site from a seed URL and/or sitemap, streaming NDJSON results.
+
+    Pages are crawled breadth-first within max_depth, max_pages and the
+    domain/path limits, at most per_host_concurrency at a time per host and
+    pool.size overall. Each line is a CrawlResponse plus its depth.
+    """
+    seed = normalize_scheme(req.url) if req.url else None
+    sitemap = normalize_scheme(req.sitemap) if req.sitemap else None
+    domains = req.allowed_domains or [urlsplit(seed or sitemap).hostname or ""]
+    frontier = UrlFrontier(req.max_pages, req.max_depth, domains,
+                           req.include_paths, req.exclude_patterns)
+    if seed:
+        frontier.add(seed, 0)
+    if sitemap:
+        await seed_from_sitemap(frontier, sitemap)
+
+    host_limits = {}
+
+    async def crawl_page(url, depth):
+        host = urlsplit(url).hostname or ""
+        limit = host_limits.setdefault(host, asyncio.Semaphore(req.per_host_concurrency))
+        async with limit:
+            try:
+                return await crawl_one(url, req.options, block=True), depth
+            except Exception as e:
+                return CrawlResponse(url=url, success=False, error=str(e)), depth
+
+    async def stream():
+        pending = set()
+        try:
+            while True:
+                while frontier and len(pending) < pool.size:
+                    pending.add(asyncio.ensure_future(crawl_page(*frontier.pop())))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    resp, depth = task.result()
+                    if resp.success and depth < req.max_depth:
+                        for link in resp.links or ():
+                            frontier.add(link, depth + 1, base=resp.url)
+                    exclude = None if req.include_links else {"links"}
+                    yield json.dumps({**resp.model_dump(exclude=exclude), "depth": depth}) + "\n"
+        finally:
+            for task in pending:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+async def seed_from_sitemap(frontier, url):
+    """Queue every page listed in a sitemap, following sitemap indexes."""
+    todo, fetched = [url], 0
+    while todo and fetched < SITEMAP_MAX_FILES and frontier.admitted < frontier.max_pages:
+        current = todo.pop()
+        fetched += 1
+        try:
+            pages, nested = parse_sitemap(await fetcher.fetch_sitemap(current))
+        except FetchError:
+            continue
+        for page in pages:
+            frontier.add(page, 0)
+        todo.extend(nested)
+
+
+@app.post("/jobs", status_code=202, response_model=JobStatus)
+async def submit_job(req: CrawlRequest):
+    """Queue a crawl and return its job id immediately."""
+    try:
+        job = jobs.submit(req)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(e.retry_after)})
+    return JSONResponse(status_code=202, content=JobStatus.of(job).model_dump(),
+                        headers={"Location": f"/jobs/{job.id}"})
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is not None:
+        return JobStatus.of(job)
+    status = jobs.load_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="job not found or expired")
+    return status
+
+
+@app.delete("/jobs/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is not None:
+        jobs.cancel(job)
+        return JobStatus.of(job)
+    status = jobs.request_cancel(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="job not found or expired")
+    return status
+
+
 @app.get("/playground", response_class=HTMLResponse)
 async def playground():
     with open(PLAYGROUND_PATH) as f:
@@ -65,5 +1484,11 @@ async def playground():
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host=os.getenv("CRAWL4AI_HOST", "0.0.0.0"),
-                port=int(os.getenv("CRAWL4AI_API_PORT", "11235")))
+    host = os.getenv("CRAWL4AI_HOST", "0.0.0.0")
+    port = int(os.getenv("CRAWL4AI_API_PORT", "11235"))
+    if WORKERS > 1:
+        # Workers import the app by name; metrics and pool stats are per worker.
+        uvicorn.run("server:app", host=host, port=port, workers=WORKERS,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)))
+    else:
+        uvicorn.run(app, host=host, port=port)
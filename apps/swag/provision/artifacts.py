@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Fetch SWAG's upstream tarballs through a content-addressed cache.
+
+    swag-artifacts fetch --lock L --cache DIR --dest DIR --status FILE [--source S]
+                         [--allow-unpinned]
+    swag-artifacts wait --status FILE [--timeout SEC]
+    swag-artifacts pin --lock L [--cache DIR] [--missing] [NAME ...]
+
+Each entry of the lock file names a GitHub repo and ref and pins a commit
+and the tarball's sha256; `pin` resolves the refs and writes both (with
+--missing, only for entries not pinned yet). fetch refuses an entry
+without both unless --allow-unpinned is given, in which case it resolves
+the ref to a commit itself. It then looks the tarball up in the cache:
+
+    DIR/sha256/<hex>          tarball blobs, named by their sha256
+    DIR/refs/<name>/<commit>  sha256 first seen for that commit
+
+On a hit the tarball is copied from the cache. On a miss it is
+downloaded, checked against the pinned sha256 or, failing that, the one
+recorded for the commit (trust on first use), stored and copied. A
+mismatch is an error, never a silent refresh. If the ref cannot be
+resolved (no network), the most recently recorded commit is used.
+
+--source replaces GitHub with a directory or base URL holding
+<name>.tar.gz, for tests and offline mirrors; only a pinned sha256 is
+checked then. All entries are fetched concurrently. The per-entry result
+is written to --status as JSON, which `wait` polls for, so the install
+can run fetch in the background and collect it later.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+API = "https://api.github.com/repos/{repo}/commits/{ref}"
+TARBALL = "https://codeload.github.com/{repo}/tar.gz/{commit}"
+TIMEOUT = 60
+
+
+class ArtifactError(Exception):
+    pass
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def atomic_write(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, "w") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def resolve(repo, ref, refs_dir):
+    """Commit for ref; falls back to the newest commit already in the cache."""
+    req = urllib.request.Request(API.format(repo=repo, ref=ref),
+                                 headers={"Accept": "application/vnd.github.sha"})
+    try:
+        with urllib.request.urlopen(req, timeout=TIMEOUT) as resp:
+            return resp.read().decode().strip(), False
+    except OSError as e:
+        known = sorted(os.listdir(refs_dir), key=lambda c: os.path.getmtime(os.path.join(refs_dir, c))) \
+            if os.path.isdir(refs_dir) else []
+        if not known:
+            raise ArtifactError(f"cannot resolve {repo}@{ref} and nothing cached: {e}")
+        return known[-1], True
+
+
+def download(url, dest):
+    if "://" not in url:
+        shutil.copyfile(url, dest)
+        return
+    with urllib.request.urlopen(url, timeout=TIMEOUT) as resp, open(dest, "wb") as f:
+        shutil.copyfileobj(resp, f)
+
+
+def fetch_one(name, entry, cache, dest_dir, source):
+    refs_dir = os.path.join(cache, "refs", name)
+    if source:
+        commit, offline = entry.get("commit") or "source", False
+        url = f"{source.rstrip('/')}/{name}.tar.gz"
+        recorded = None
+    else:
+        commit, offline = entry.get("commit"), False
+        if not commit:
+            commit, offline = resolve(entry["repo"], entry.get("ref", "master"), refs_dir)
+        url = TARBALL.format(repo=entry["repo"], commit=commit)
+        ref_file = os.path.join(refs_dir, commit)
+        recorded = open(ref_file).read().strip() if os.path.isfile(ref_file) else None
+    if entry.get("sha256") and recorded and entry["sha256"] != recorded:
+        raise ArtifactError(f"{name}: lock sha256 {entry['sha256']} disagrees with cache record {recorded}")
+    expected = entry.get("sha256") or recorded
+
+    dest = os.path.join(dest_dir, f"{name}.tar.gz")
+    blob = os.path.join(cache, "sha256", expected) if expected else None
+    if blob and os.path.isfile(blob) and sha256_file(blob) == expected:
+        shutil.copyfile(blob, dest)
+        return {"commit": commit, "sha256": expected, "cached": True, "offline": offline}
+
+    os.makedirs(os.path.join(cache, "sha256"), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.join(cache, "sha256"), suffix=".part")
+    os.close(fd)
+    try:
+        download(url, tmp)
+        digest = sha256_file(tmp)
+        if expected and digest != expected:
+            raise ArtifactError(f"{name}: {url} has sha256 {digest}, expected {expected}")
+        os.replace(tmp, os.path.join(cache, "sha256", digest))
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    if not source and not recorded:
+        atomic_write(os.path.join(refs_dir, commit), digest + "\n")
+    shutil.copyfile(os.path.join(cache, "sha256", digest), dest)
+    return {"commit": commit, "sha256": digest, "cached": False, "offline": offline}
+
+
+def pinned(entry):
+    return bool(entry.get("commit") and entry.get("sha256"))
+
+
+def fetch(args):
+    try:
+        with open(args.lock) as f:
+            lock = json.load(f)
+        os.makedirs(args.dest, exist_ok=True)
+    except (OSError, ValueError) as e:
+        # Still write a status, so that `wait` fails now rather than at its timeout
+        lock, failed = {}, {"lock": {"ok": False, "error": str(e)}}
+    else:
+        failed = {}
+
+    def run(name):
+        start = time.monotonic()
+        try:
+            if not args.allow_unpinned and not pinned(lock[name]):
+                raise ArtifactError(f"{name}: not pinned to a commit and sha256 in {args.lock} "
+                                    f"(run `swag-artifacts pin`, or pass --allow-unpinned)")
+            result = fetch_one(name, lock[name], args.cache, args.dest, args.source)
+            result["ok"] = True
+        except (OSError, ValueError, KeyError, ArtifactError) as e:
+            result = {"ok": False, "error": str(e)}
+        result["seconds"] = round(time.monotonic() - start, 2)
+        return name, result
+
+    with ThreadPoolExecutor(max_workers=len(lock) or 1) as pool:
+        status = dict(pool.map(run, sorted(lock)), **failed)
+    atomic_write(args.status, json.dumps(status, indent=2, sort_keys=True) + "\n")
+    for name, result in status.items():
+        print(f"{name}: {json.dumps(result, sort_keys=True)}")
+    return 0 if all(r["ok"] for r in status.values()) else 1
+
+
+def wait(args):
+    deadline = time.monotonic() + args.timeout
+    while not os.path.isfile(args.status):
+        if time.monotonic() > deadline:
+            print(f"timed out after {args.timeout}s waiting for {args.status}", file=sys.stderr)
+            return 1
+        time.sleep(0.5)
+    with open(args.status) as f:
+        status = json.load(f)
+    for name, result in sorted(status.items()):
+        if result["ok"]:
+            source = "cache" if result["cached"] else "download"
+            note = ", ref unresolved, using last cached commit" if result["offline"] else ""
+            print(f"{name}: {result['commit']} sha256 {result['sha256']} from {source}{note}")
+        else:
+            print(f"{name}: FAILED {result['error']}", file=sys.stderr)
+    return 0 if all(r["ok"] for r in status.values()) else 1
+
+
+def pin(args):
+    """Resolve each entry's ref, download its tarball and write commit and sha256."""
+    with open(args.lock) as f:
+        lock = json.load(f)
+    unknown = set(args.names) - lock.keys()
+    if unknown:
+        print(f"not in {args.lock}: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 1
+    names = [n for n in sorted(args.names or lock) if not (args.missing and pinned(lock[n]))]
+    if not names:
+        print("all entries pinned")
+        return 0
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = args.cache or os.path.join(tmp, "cache")
+        for name in names:
+            entry = lock[name]
+            commit, offline = resolve(entry["repo"], entry.get("ref", "master"),
+                                      os.path.join(cache, "refs", name))
+            if offline:
+                print(f"{name}: cannot resolve {entry['repo']}@{entry.get('ref', 'master')}", file=sys.stderr)
+                return 1
+            if commit != entry.get("commit"):
+                entry["sha256"] = None
+            result = fetch_one(name, dict(entry, commit=commit), cache, tmp, "")
+            print(f"{name}: {entry.get('commit')} -> {commit} sha256 {result['sha256']}")
+            entry["commit"], entry["sha256"] = commit, result["sha256"]
+    atomic_write(args.lock, json.dumps(lock, indent=2) + "\n")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    f = sub.add_parser("fetch")
+    f.add_argument("--lock", required=True)
+    f.add_argument("--cache", required=True)
+    f.add_argument("--dest", required=True)
+    f.add_argument("--status", required=True)
+    f.add_argument("--source", default="")
+    f.add_argument("--allow-unpinned", action="store_true",
+                   help="fetch entries without a pinned commit and sha256 (trust on first use)")
+    w = sub.add_parser("wait")
+    w.add_argument("--status", required=True)
+    w.add_argument("--timeout", type=int, default=600)
+    p = sub.add_parser("pin")
+    p.add_argument("--lock", required=True)
+    p.add_argument("--cache", help="artifact cache to fill (default: a temporary one)")
+    p.add_argument("--missing", action="store_true", help="only pin entries without a commit and sha256")
+    p.add_argument("names", nargs="*", help="entries to pin (default: all)")
+    args = parser.parse_args()
+    try:
+        sys.exit({"fetch": fetch, "wait": wait, "pin": pin}[args.command](args))
+    except (OSError, ValueError, KeyError, ArtifactError) as e:
+        print(f"{args.command}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
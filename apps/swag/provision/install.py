@@ -7,8 +7,99 @@ and 300+ preset proxy configs for popular apps.
 
 Based on linuxserver/docker-swag, adapted for LXC.
 """
+import os
+import re
+import shlex
+
 from appstore import BaseApp, run
 
+# ban_action input -> (fail2ban action, packages it needs)
+BAN_ACTIONS = {
+    "ipset": ("iptables-ipset-proto6-allports", ["ipset"]),
+    "nftables": ("nftables-allports", ["nftables"]),
+    "iptables": ("iptables-allports", []),
+}
+
+# performance_profile input -> nginx sizing; "custom" takes worker
+# connections from its own input and the rest from "medium"
+NGINX_PROFILES = {
+    "small":  {"connections": 1024,  "open_files": 1000,  "ssl_cache_mb": 10,
+               "h2_streams": 64,  "log_buffer": "16k"},
+    "medium": {"connections": 4096,  "open_files": 10000, "ssl_cache_mb": 32,
+               "h2_streams": 128, "log_buffer": "64k"},
+    "large":  {"connections": 16384, "open_files": 50000, "ssl_cache_mb": 128,
+               "h2_streams": 256, "log_buffer": "256k"},
+}
+# Memory budget per connection when capping worker_connections: request
+# state plus a share of the 32 x 4k proxy buffers
+CONNECTION_KB = 64
+
+JAIL_LOCAL = "/config/fail2ban/jail.local"
+
+ARTIFACTS = "/tmp/swag-artifacts"
+ARTIFACT_STATUS = "/tmp/swag-artifacts.json"
+
+# dnsplugin input value -> pip package providing its certbot authenticator
+DNS_PLUGINS = {
+    "acmedns": "certbot-dns-acmedns",
+    "aliyun": "certbot-dns-aliyun",
+    "azure": "certbot-dns-azure",
+    "bunny": "certbot-dns-bunny",
+    "cloudflare": "certbot-dns-cloudflare",
+    "cpanel": "certbot-dns-cpanel",
+    "desec": "certbot-dns-desec",
+    "digitalocean": "certbot-dns-digitalocean",
+    "directadmin": "certbot-dns-directadmin",
+    "dnsimple": "certbot-dns-dnsimple",
+    "dnsmadeeasy": "certbot-dns-dnsmadeeasy",
+    "dnspod": "certbot-dns-dnspod",
+    "do": "certbot-dns-do",
+    "domeneshop": "certbot-dns-domeneshop",
+    "dreamhost": "certbot-dns-dreamhost",
+    "duckdns": "certbot-dns-duckdns",
+    "dynudns": "certbot-dns-dynudns",
+    "freedns": "certbot-dns-freedns",
+    "gandi": "certbot-plugin-gandi",
+    "gehirn": "certbot-dns-gehirn",
+    "glesys": "certbot-dns-glesys",
+    "godaddy": "certbot-dns-godaddy",
+    "google": "certbot-dns-google",
+    "he": "certbot-dns-he",
+    "hetzner": "certbot-dns-hetzner",
+    "infomaniak": "certbot-dns-infomaniak",
+    "inwx": "certbot-dns-inwx",
+    "ionos": "certbot-dns-ionos",
+    "linode": "certbot-dns-linode",
+    "loopia": "certbot-dns-loopia",
+    "luadns": "certbot-dns-luadns",
+    "namecheap": "certbot-dns-namecheap",
+    "netcup": "certbot-dns-netcup",
+    "njalla": "certbot-dns-njalla",
+    "nsone": "certbot-dns-nsone",
+    "ovh": "certbot-dns-ovh",
+    "porkbun": "certbot-dns-porkbun",
+    "rfc2136": "certbot-dns-rfc2136",
+    "route53": "certbot-dns-route53",
+    "sakuracloud": "certbot-dns-sakuracloud",
+    "standalone": "certbot-dns-standalone",
+    "transip": "certbot-dns-transip",
+    "vultr": "certbot-dns-vultr",
+}
+
+
+def _jail_setting(text, key):
+    """First value of key in a fail2ban .local file ([DEFAULT] comes first)."""
+    m = re.search(rf"^{key}\s*=\s*(.*?)\s*$", text, re.M)
+    return m.group(1) if m else None
+
+
+def _set_jail_setting(text, key, value):
+    """text with key's first assignment set to value, added to [DEFAULT] if missing."""
+    line = re.compile(rf"^({key}\s*=\s*).*$", re.M)
+    if line.search(text):
+        return line.sub(lambda m: m.group(1) + value, text, count=1)
+    return re.sub(r"^\[DEFAULT\]\s*$", lambda m: f"{m.group(0)}\n{key} = {value}", text, count=1, flags=re.M)
+
 
 class Swag(BaseApp):
 
@@ -24,6 +115,13 @@ class Swag(BaseApp):
         extra       = self.inputs.string("extra_domains", "")
         port_http   = self.inputs.integer("port_http", 80)
         port_https  = self.inputs.integer("port_https", 443)
+        plugins     = self.inputs.string("certbot_plugins", "selected")
+        source      = self.inputs.string("artifact_source", "")
+        unpinned    = self.inputs.boolean("artifact_allow_unpinned", False)
+        ban_action  = self.inputs.string("ban_action", "ipset")
+        backend     = self.inputs.string("fail2ban_backend", "auto")
+        profile     = self.inputs.string("performance_profile", "medium")
+        connections = self.inputs.integer("nginx_worker_connections", 4096)
 
         # ── Install system packages ─────────────────────────────────
         self.log.info("Installing system packages...")
@@ -36,58 +134,34 @@ class Swag(BaseApp):
             "inotify-tools",
         )
 
-        # ── Install certbot + all DNS plugins in /lsiopy venv ───────
-        # Matches the full linuxserver/docker-swag plugin set
-        self.log.info("Installing certbot and DNS plugins...")
-        self.pip_install(
-            "certbot",
-            "certbot-dns-acmedns",
-            "certbot-dns-aliyun",
-            "certbot-dns-azure",
-            "certbot-dns-bunny",
-            "certbot-dns-cloudflare",
-            "certbot-dns-cpanel",
-            "certbot-dns-desec",
-            "certbot-dns-digitalocean",
-            "certbot-dns-directadmin",
-            "certbot-dns-dnsimple",
-            "certbot-dns-dnsmadeeasy",
-            "certbot-dns-dnspod",
-            "certbot-dns-do",
-            "certbot-dns-domeneshop",
-            "certbot-dns-dreamhost",
-            "certbot-dns-duckdns",
-            "certbot-dns-dynudns",
-            "certbot-dns-freedns",
-            "certbot-dns-gehirn",
-            "certbot-dns-glesys",
-            "certbot-dns-godaddy",
-            "certbot-dns-google",
-            "certbot-dns-he",
-            "certbot-dns-hetzner",
-            "certbot-dns-infomaniak",
-            "certbot-dns-inwx",
-            "certbot-dns-ionos",
-            "certbot-dns-linode",
-            "certbot-dns-loopia",
-            "certbot-dns-luadns",
-            "certbot-dns-namecheap",
-            "certbot-dns-netcup",
-            "certbot-dns-njalla",
-            "certbot-dns-nsone",
-            "certbot-dns-ovh",
-            "certbot-dns-porkbun",
-            "certbot-dns-rfc2136",
-            "certbot-dns-route53",
-            "certbot-dns-sakuracloud",
-            "certbot-dns-standalone",
-            "certbot-dns-transip",
-            "certbot-dns-vultr",
-            "certbot-plugin-gandi",
-            "cryptography",
-            "requests",
-            venv="/lsiopy",
-        )
+        # ── Fetch upstream configs in the background ───────────────
+        # proxy-confs and docker-swag defaults come through the node's
+        # artifact cache, pinned by commit and verified by sha256, while
+        # pip runs; see artifacts.py. Unpinned lock entries fail unless the
+        # operator allows them
+        self.log.info("Fetching preset proxy configs and SWAG defaults...")
+        self.create_dir("/var/cache/appstore")
+        self.deploy_provision_file("artifacts.py", "/usr/local/bin/swag-artifacts", mode="0755")
+        self.deploy_provision_file("artifacts.lock.json", "/etc/swag/artifacts.lock.json")
+        self.run_command(["rm", "-rf", ARTIFACTS, ARTIFACT_STATUS])
+        fetch = [
+            "python3", "/usr/local/bin/swag-artifacts", "fetch",
+            "--lock", "/etc/swag/artifacts.lock.json",
+            "--cache", "/var/cache/appstore",
+            "--dest", ARTIFACTS,
+            "--status", ARTIFACT_STATUS,
+        ]
+        if source:
+            fetch.extend(["--source", source])
+        if unpinned:
+            fetch.append("--allow-unpinned")
+        self.run_command([
+            "sh", "-c",
+            f"nohup {shlex.join(fetch)} > {ARTIFACTS}.log 2>&1 &",
+        ])
+
+        # ── Install certbot + the DNS plugin in /lsiopy venv ────────
+        self._install_certbot(validation, dnsplugin, plugins)
 
         # ── Create directory structure ──────────────────────────────
         self.log.info("Creating config directory structure...")
@@ -110,8 +184,7 @@ class Swag(BaseApp):
 
         # ── Deploy nginx configs from templates ─────────────────────
         self.log.info("Deploying nginx configuration...")
-        self.deploy_provision_file("nginx.conf", "/etc/nginx/nginx.conf")
-        self.deploy_provision_file("ssl.conf", "/config/nginx/ssl.conf")
+        self._render_nginx(profile, connections)
         self.deploy_provision_file("proxy.conf", "/config/nginx/proxy.conf")
         self.deploy_provision_file("default-site.conf",
                                    "/config/nginx/site-confs/default.conf")
@@ -121,30 +194,26 @@ class Swag(BaseApp):
         self.run_command(["rm", "-f", "/etc/nginx/http.d/default.conf"],
                          check=False)
 
-        # ── Download preset reverse proxy configs ───────────────────
-        self.log.info("Downloading 300+ preset proxy configs...")
-        self.download(
-            "https://github.com/linuxserver/reverse-proxy-confs/tarball/master",
-            "/tmp/proxy-confs.tar.gz",
-        )
+        # ── Unpack preset proxy configs and SWAG defaults ───────────
         self.run_command([
-            "tar", "xf", "/tmp/proxy-confs.tar.gz",
+            "python3", "/usr/local/bin/swag-artifacts", "wait",
+            "--status", ARTIFACT_STATUS, "--timeout", "600",
+        ])
+        self.run_command([
+            "tar", "xzf", f"{ARTIFACTS}/proxy-confs.tar.gz",
             "-C", "/config/nginx/proxy-confs",
             "--strip-components=1",
-            "--exclude=linux*/.editorconfig",
-            "--exclude=linux*/.gitattributes",
-            "--exclude=linux*/.github",
-            "--exclude=linux*/.gitignore",
-            "--exclude=linux*/LICENSE",
+            "--exclude=*/.editorconfig",
+            "--exclude=*/.gitattributes",
+            "--exclude=*/.github",
+            "--exclude=*/.gitignore",
+            "--exclude=*/LICENSE",
         ], check=False)
-        self.run_command(["rm", "-f", "/tmp/proxy-confs.tar.gz"])
 
-        # ── Clone SWAG defaults (dns-conf templates, fail2ban) ──────
-        self.log.info("Fetching DNS credential templates and fail2ban configs...")
+        self.create_dir("/tmp/_swag")
         self.run_command([
-            "git", "clone", "--depth", "1",
-            "https://github.com/linuxserver/docker-swag.git",
-            "/tmp/_swag",
+            "tar", "xzf", f"{ARTIFACTS}/docker-swag.tar.gz",
+            "-C", "/tmp/_swag", "--strip-components=1",
         ])
 
         # Copy DNS credential templates
@@ -163,12 +232,7 @@ class Swag(BaseApp):
             "/config/fail2ban/",
         ], check=False)
 
-        self.run_command(["rm", "-rf", "/tmp/_swag"])
-
-        # ── Deploy fail2ban config ──────────────────────────────────
-        self.log.info("Configuring fail2ban...")
-        self.deploy_provision_file("jail.local",
-                                   "/config/fail2ban/jail.local")
+        self.run_command(["rm", "-rf", "/tmp/_swag", ARTIFACTS, ARTIFACT_STATUS])
 
         # Symlink user configs into fail2ban expected paths
         self.run_command(["rm", "-rf", "/etc/fail2ban/filter.d"])
@@ -179,9 +243,9 @@ class Swag(BaseApp):
         self.run_command([
             "ln", "-sf", "/config/fail2ban/action.d", "/etc/fail2ban/action.d",
         ])
-        self.run_command([
-            "cp", "/config/fail2ban/jail.local", "/etc/fail2ban/jail.local",
-        ])
+
+        # ── Deploy fail2ban config ──────────────────────────────────
+        self._configure_fail2ban(ban_action, backend, force=True)
 
         # Create empty log files (fail2ban needs them to exist)
         for log in ["/config/log/nginx/error.log",
@@ -227,12 +291,22 @@ class Swag(BaseApp):
             mode="0755",
         )
 
+        # ── Config watcher: validate and reload nginx on changes ────
+        self.deploy_provision_file("swag-watch.sh", "/usr/local/bin/swag-watch", mode="0755")
+        self.create_service(
+            "swag-watch",
+            exec_start="/usr/local/bin/swag-watch",
+            description="Validate and hot-reload nginx when SWAG config changes",
+        )
+
         # ── Enable and start services ───────────────────────────────
         self.log.info("Starting services...")
         self.enable_service("nginx")
         self.enable_service("fail2ban")
+        self.enable_service("swag-watch")
         self.restart_service("nginx")
         self.restart_service("fail2ban")
+        self.restart_service("swag-watch")
 
         self.log.info("SWAG installation complete")
 
@@ -246,6 +320,23 @@ class Swag(BaseApp):
         only_sub    = self.inputs.boolean("only_subdomains", False)
         staging     = self.inputs.boolean("staging", False)
         extra       = self.inputs.string("extra_domains", "")
+        plugins     = self.inputs.string("certbot_plugins", "selected")
+        ban_action  = self.inputs.string("ban_action", "ipset")
+        backend     = self.inputs.string("fail2ban_backend", "auto")
+        profile     = self.inputs.string("performance_profile", "medium")
+        connections = self.inputs.integer("nginx_worker_connections", 4096)
+
+        # Paused so the ssl.conf rewrite below does not trigger a second
+        # reload; configure reloads nginx once at the end
+        self.run_command(["rc-service", "swag-watch", "stop"], check=False)
+
+        # A newly chosen provider's plugin is added here, not at install
+        self._install_certbot(validation, dnsplugin, plugins)
+
+        if self._configure_fail2ban(ban_action, backend):
+            self.restart_service("fail2ban")
+
+        self._render_nginx(profile, connections)
 
         if url:
             self.log.info(f"Re-requesting certificate for {url}...")
@@ -253,7 +344,116 @@ class Swag(BaseApp):
                 url, validation, dnsplugin, email,
                 subdomains, only_sub, staging, extra,
             )
-            self.restart_service("nginx")
+
+        # Graceful: picks up new certs and sizing without dropping connections
+        self.run_command(["rc-service", "nginx", "reload"], check=False)
+        self.restart_service("swag-watch")
+
+    def _install_certbot(self, validation, dnsplugin, plugins):
+        """pip-install certbot plus the DNS plugin(s) the inputs call for.
+
+        Already-installed packages are a no-op for pip, so configure() can
+        call this on every reconfigure and only a new plugin is fetched.
+        """
+        if plugins == "all":
+            # Matches the full linuxserver/docker-swag plugin set
+            self.log.info("Installing certbot and all DNS plugins...")
+            packages = sorted(set(DNS_PLUGINS.values()))
+        elif validation == "dns":
+            self.log.info(f"Installing certbot and the {dnsplugin} DNS plugin...")
+            packages = [DNS_PLUGINS.get(dnsplugin, f"certbot-dns-{dnsplugin}")]
+        else:
+            self.log.info("Installing certbot...")
+            packages = []
+        self.pip_install("certbot", *packages, venv="/lsiopy")
+
+    def _render_nginx(self, profile, custom_connections):
+        """Render nginx.conf and ssl.conf sized for this container."""
+        cores, memory_mb = self._container_resources()
+        sizing = dict(NGINX_PROFILES.get(profile, NGINX_PROFILES["medium"]))
+        if profile == "custom":
+            sizing["connections"] = custom_connections
+        elif memory_mb:
+            # worker_processes is auto (one per core); keep all workers'
+            # connections within memory
+            cap = memory_mb * 1024 // CONNECTION_KB // cores
+            sizing["connections"] = max(512, min(sizing["connections"], cap))
+        if memory_mb:
+            sizing["ssl_cache_mb"] = max(1, min(sizing["ssl_cache_mb"], memory_mb // 32))
+        # A proxied request holds two descriptors: client and upstream
+        rlimit = sizing["connections"] * 2 + 1024
+
+        self.log.info(f"nginx profile {profile}: {cores} cores, {memory_mb or '?'} MB, "
+                      f"{sizing['connections']} connections per worker")
+        self.render_template("nginx.conf", "/etc/nginx/nginx.conf",
+            profile=profile,
+            cores=cores,
+            memory_mb=memory_mb or "unknown",
+            worker_connections=sizing["connections"],
+            worker_rlimit_nofile=rlimit,
+            keepalive_requests=1000,
+            access_log_buffer=sizing["log_buffer"],
+            open_file_cache_max=sizing["open_files"],
+            http2_max_concurrent_streams=sizing["h2_streams"],
+        )
+        self.render_template("ssl.conf", "/config/nginx/ssl.conf",
+            ssl_session_cache_mb=sizing["ssl_cache_mb"],
+        )
+
+    def _container_resources(self):
+        """(cores, memory MB) as the container sees them; memory may be None.
+
+        Proxmox pins a container's cores with a cpuset and lxcfs reports its
+        memory limit in /proc/meminfo.
+        """
+        try:
+            cores = len(os.sched_getaffinity(0))
+        except (AttributeError, OSError):
+            cores = os.cpu_count() or 1
+        try:
+            with open("/proc/meminfo") as f:
+                for line in f:
+                    if line.startswith("MemTotal:"):
+                        return cores, int(line.split()[1]) // 1024
+        except (OSError, ValueError):
+            pass
+        return cores, None
+
+    def _configure_fail2ban(self, ban_action, backend, force=False):
+        """Install what the ban action and backend need and set them in jail.local.
+
+        An existing jail.local keeps the user's edits: only its banaction
+        and backend lines are updated. Returns False, having changed
+        nothing, when both already match and force is not set.
+        """
+        action, packages = BAN_ACTIONS.get(ban_action, BAN_ACTIONS["ipset"])
+        try:
+            with open(JAIL_LOCAL) as f:
+                current = f.read()
+        except FileNotFoundError:
+            current = None
+        if not force and current is not None and \
+                _jail_setting(current, "banaction") == action and \
+                _jail_setting(current, "backend") == backend:
+            self.log.info("fail2ban ban action and backend unchanged")
+            return False
+
+        self.log.info(f"Configuring fail2ban ({ban_action} bans, {backend} backend)...")
+        # With pyinotify installed, backend "auto" also picks it over polling
+        if backend in ("auto", "pyinotify"):
+            packages = packages + ["py3-pyinotify"]
+        if packages:
+            self.pkg_install(*packages)
+        if current is None:
+            self.render_template("jail.local", JAIL_LOCAL,
+                banaction=action,
+                backend=backend,
+            )
+        else:
+            text = _set_jail_setting(current, "banaction", action)
+            self.write_config(JAIL_LOCAL, _set_jail_setting(text, "backend", backend))
+        self.run_command(["cp", JAIL_LOCAL, "/etc/fail2ban/jail.local"])
+        return True
 
     def _request_certificate(self, url, validation, dnsplugin, email,
                               subdomains, only_sub, staging, extra):
@@ -0,0 +1,61 @@
+#!/bin/bash
+## SWAG LXC — Config watcher (runs as the swag-watch OpenRC service)
+## Coalesces bursts of changes under /config/nginx and /config/dns-conf,
+## validates with nginx -t and gracefully reloads only if that passes
+
+WATCH_DIRS=(/config/nginx /config/dns-conf)
+LOG=${SWAG_WATCH_LOG:-/config/log/nginx/watch.log}
+QUIET_SEC=${SWAG_WATCH_QUIET_SEC:-2}   # act once no event arrived for this long
+MAX_WAIT_SEC=${SWAG_WATCH_MAX_WAIT_SEC:-15}   # but never hold a change longer
+
+reloads=0
+failures=0
+
+log() {
+    echo "$(date '+%Y-%m-%d %H:%M:%S') swag-watch: $*"
+}
+
+# Editor swap and backup files never affect nginx
+ignored() {
+    case "$1" in
+        *.swp|*.swx|*~|*/4913|*/.#*) return 0 ;;
+    esac
+    return 1
+}
+
+exec >>"$LOG" 2>&1
+
+exec {events}< <(inotifywait -m -r -q \
+    -e close_write,create,delete,moved_to,moved_from \
+    --format '%w%f' "${WATCH_DIRS[@]}")
+watcher=$!
+trap 'kill "$watcher" 2>/dev/null; log "stopped after $reloads reload(s), $failures failure(s)"; exit 0' TERM INT
+
+log "watching ${WATCH_DIRS[*]} (quiet ${QUIET_SEC}s, max wait ${MAX_WAIT_SEC}s)"
+
+while read -r -u "$events" path; do
+    ignored "$path" && continue
+    changed=1
+    first=$path
+    start=$SECONDS
+    while (( SECONDS - start < MAX_WAIT_SEC )) && read -r -t "$QUIET_SEC" -u "$events" path; do
+        ignored "$path" || changed=$((changed + 1))
+    done
+
+    if output=$(nginx -t 2>&1); then
+        if nginx -s reload 2>&1; then
+            reloads=$((reloads + 1))
+            log "reload #$reloads after $changed change(s), first: $first"
+        else
+            failures=$((failures + 1))
+            log "reload failed (failure #$failures) after $changed change(s)"
+        fi
+    else
+        failures=$((failures + 1))
+        log "nginx -t failed (failure #$failures) after $changed change(s), first: $first; keeping running config"
+        echo "$output" | sed 's/^/    /'
+    fi
+done
+
+log "inotifywait exited; stopping"
+exit 1
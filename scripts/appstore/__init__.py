@@ -0,0 +1,11 @@
+"""Offline stand-in for the PVE App Store SDK.
+
+Implements the BaseApp surface install scripts use, but records every
+operation into a plan instead of changing the system; see dryrun.py.
+Put scripts/ on sys.path (scripts/dry-run.py does) so that
+`from appstore import BaseApp, run` resolves here.
+"""
+from .dryrun import run, run_app
+from .sdk import BaseApp, PermissionDenied, SDKError
+
+__all__ = ["BaseApp", "PermissionDenied", "SDKError", "run", "run_app"]
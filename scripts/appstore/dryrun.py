@@ -0,0 +1,255 @@
+"""Dry-run an app's install script against a temporary root.
+
+run_app() executes provision/install.py in-process with the SDK stand-in
+active. The result is a plan: every SDK step in order, the files the script
+left under the sandbox root (with sha256), log lines and outputs. Plans are
+deterministic, so two plans can be diffed line by line:
+
+- os.urandom and random are seeded for the duration of the run;
+- os.cpu_count, os.sched_getaffinity and /proc/meminfo report the
+  container's lxc.defaults cores and memory_mb, not the host's;
+- absolute paths passed to open() by the script itself are redirected into
+  the sandbox root;
+- os.environ is restored afterwards.
+
+Timings are kept out of the plan and collected as separate step records.
+"""
+import builtins
+import contextlib
+import hashlib
+import io
+import os
+import random
+import runpy
+import shutil
+import sys
+import tempfile
+import time
+
+import yaml
+
+from . import profile
+from .sdk import SDKError
+
+PLAN_FORMAT = 1
+
+_active = None
+
+
+class Plan:
+    def __init__(self):
+        self.steps = []
+        self.log = []
+        self.outputs = {}
+
+    def add(self, op, args):
+        step = {"op": op, "args": args, "status": "ok"}
+        self.steps.append(step)
+        return step
+
+
+class Context:
+    def __init__(self, app_id, app_dir, manifest, inputs, action, root):
+        self.app_id = app_id
+        self.app_dir = app_dir
+        self.provision_dir = os.path.join(app_dir, "provision")
+        self.permissions = manifest.get("permissions") or {}
+        defaults = (manifest.get("lxc") or {}).get("defaults") or {}
+        self.cores = int(defaults.get("cores") or 1)
+        self.memory_mb = int(defaults.get("memory_mb") or 512)
+        self.inputs = inputs
+        self.action = action
+        self.root = root
+        self.plan = Plan()
+        self.modes = {}
+        self.records = []
+        self.written = 0
+        self._depth = 0
+        self._start = time.perf_counter()
+
+    def host_path(self, path):
+        """Where an absolute container path lives under the sandbox root."""
+        return os.path.join(self.root, os.path.normpath(path).lstrip("/"))
+
+    def make_dir(self, path):
+        os.makedirs(self.host_path(path), exist_ok=True)
+
+    def write_file(self, path, data, mode=None):
+        host = self.host_path(path)
+        os.makedirs(os.path.dirname(host), exist_ok=True)
+        with _real_open(host, "wb") as f:
+            f.write(data)
+        self.written += len(data)
+        if mode:
+            self.modes[os.path.normpath(path)] = mode
+
+    def timed(self, method, *args, **kwargs):
+        """Run one SDK call and record a step record for each step it adds."""
+        if self._depth:
+            return method(*args, **kwargs)
+        first, written, failed = len(self.plan.steps), self.written, False
+        start = time.perf_counter()
+        self._depth += 1
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._depth -= 1
+            duration = time.perf_counter() - start
+            for step in self.plan.steps[first:]:
+                if failed and step["status"] == "ok":
+                    step = dict(step, status="failed")
+                self.records.append(profile.make_record(
+                    self.app_id, "dry-run", len(self.records) + 1, step,
+                    start - self._start, duration, self.written - written))
+
+    def files(self):
+        result = {}
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                host = os.path.join(dirpath, name)
+                path = "/" + os.path.relpath(host, self.root)
+                with _real_open(host, "rb") as f:
+                    data = f.read()
+                entry = {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data)}
+                if path in self.modes:
+                    entry["mode"] = self.modes[path]
+                result[path] = entry
+        return dict(sorted(result.items()))
+
+
+_real_open = builtins.open
+
+
+def default_inputs(manifest, app_dir, overrides=None):
+    """Input values from app.yml defaults, then test.yml, then explicit overrides."""
+    values = {i["key"]: i.get("default") for i in manifest.get("inputs") or []}
+    test_yml = os.path.join(app_dir, "test.yml")
+    if os.path.isfile(test_yml):
+        with _real_open(test_yml) as f:
+            values.update((yaml.safe_load(f) or {}).get("inputs") or {})
+    values.update(overrides or {})
+    return values
+
+
+@contextlib.contextmanager
+def _sandbox(ctx):
+    """Seed randomness, redirect the script's own file access, restore env."""
+    global _active
+    passthrough = tuple(os.path.realpath(p) + os.sep for p in
+                        {sys.prefix, sys.base_prefix, ctx.app_dir, ctx.root})
+
+    meminfo = f"MemTotal: {ctx.memory_mb * 1024} kB\nMemFree: {ctx.memory_mb * 1024} kB\n"
+
+    def sandboxed_open(file, mode="r", *args, **kwargs):
+        if file == "/proc/meminfo" and mode in ("r", "rt"):
+            return io.StringIO(meminfo)
+        if isinstance(file, str) and os.path.isabs(file) and \
+                not os.path.realpath(file).startswith(passthrough):
+            file = ctx.host_path(file)
+            if any(c in mode for c in "wax+"):
+                os.makedirs(os.path.dirname(file), exist_ok=True)
+        return _real_open(file, mode, *args, **kwargs)
+
+    counter = iter(range(1 << 62))
+
+    def seeded_urandom(n):
+        out = b""
+        while len(out) < n:
+            out += hashlib.sha256(f"{ctx.app_id}:{next(counter)}".encode()).digest()
+        return out[:n]
+
+    saved_env = dict(os.environ)
+    saved_urandom, saved_random = os.urandom, random.getstate()
+    saved_cpus = os.cpu_count, getattr(os, "sched_getaffinity", None)
+    saved_argv = sys.argv
+    builtins.open, os.urandom, _active = sandboxed_open, seeded_urandom, ctx
+    os.cpu_count = lambda: ctx.cores
+    os.sched_getaffinity = lambda pid: set(range(ctx.cores))
+    random.seed(ctx.app_id)
+    sys.argv = [os.path.join(ctx.provision_dir, "install.py")]
+    try:
+        yield
+    finally:
+        builtins.open, os.urandom, _active = _real_open, saved_urandom, None
+        os.cpu_count = saved_cpus[0]
+        if saved_cpus[1]:
+            os.sched_getaffinity = saved_cpus[1]
+        else:
+            del os.sched_getaffinity
+        random.setstate(saved_random)
+        sys.argv = saved_argv
+        os.environ.clear()
+        os.environ.update(saved_env)
+
+
+def run_app(app_dir, inputs=None, action="install", keep_root=None, records=None):
+    """Dry-run one app; returns (plan dict, elapsed seconds).
+
+    If records is a list, the run's step records are appended to it.
+    """
+    app_dir = os.path.abspath(app_dir)
+    app_id = os.path.basename(app_dir)
+    with _real_open(os.path.join(app_dir, "app.yml")) as f:
+        manifest = yaml.safe_load(f)
+    root = keep_root or tempfile.mkdtemp(prefix=f"dryrun-{app_id}-")
+    ctx = Context(app_id, app_dir, manifest, default_inputs(manifest, app_dir, inputs), action, root)
+
+    result, error = "ok", None
+    start = time.perf_counter()
+    try:
+        with _sandbox(ctx):
+            runpy.run_path(os.path.join(ctx.provision_dir, "install.py"), run_name="__main__")
+    except SDKError as e:
+        result, error = "failed", str(e)
+    except Exception as e:  # noqa: BLE001 - a crashing script is a dry-run result, not a tool error
+        result, error = "crashed", f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - start
+
+    secrets = [str(v) for k, v in ctx.inputs.items() if v and k in _secret_keys(manifest)]
+    plan = {
+        "format": PLAN_FORMAT,
+        "app": app_id,
+        "version": str(manifest.get("version", "")),
+        "action": action,
+        "inputs": {k: ctx.inputs[k] for k in sorted(ctx.inputs)},
+        "result": result,
+        "error": error,
+        "steps": ctx.plan.steps,
+        "files": ctx.files(),
+        "outputs": ctx.plan.outputs,
+        "log": ctx.plan.log,
+    }
+    plan = _redact(plan, secrets)
+    if records is not None:
+        records.extend(_redact(ctx.records, secrets))
+    if not keep_root:
+        shutil.rmtree(root, ignore_errors=True)
+    return plan, elapsed
+
+
+def _secret_keys(manifest):
+    keys = {i["key"] for i in manifest.get("inputs") or [] if i.get("type") == "secret"}
+    return keys | set((manifest.get("provisioning") or {}).get("redact_keys") or [])
+
+
+def _redact(value, secrets):
+    if isinstance(value, str):
+        for secret in secrets:
+            value = value.replace(secret, "***")
+        return value
+    if isinstance(value, dict):
+        return {k: _redact(v, secrets) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact(v, secrets) for v in value]
+    return value
+
+
+def run(app_class):
+    """Entry point called at the bottom of every install.py."""
+    if _active is None:
+        raise SDKError("appstore stand-in: run install scripts with scripts/dry-run.py")
+    app = app_class(_active)
+    getattr(app, _active.action)()
@@ -0,0 +1,44 @@
+"""Permission matching rules, shared by the SDK stand-in and the static checker.
+
+packages, pip, services and users match exactly; commands match by full path
+or basename; urls and installer_scripts are globs; paths and apt_repos are
+prefixes.
+"""
+import fnmatch
+import os
+import re
+import shlex
+
+
+def allowed(permission, value, allow):
+    if permission == "packages":
+        return re.split(r"[=<>]", value, 1)[0] in allow
+    if permission == "pip":
+        return re.split(r"[\[=<>!~ ;]", value, 1)[0].lower() in {p.lower() for p in allow}
+    if permission in ("services", "users"):
+        return value in allow
+    if permission == "commands":
+        return value in allow or os.path.basename(value) in allow
+    if permission in ("urls", "installer_scripts"):
+        return any(fnmatch.fnmatchcase(value, pattern) for pattern in allow)
+    if permission == "paths":
+        # "/opt/app/" also covers the directory itself, written "/opt/app"
+        return any(value.startswith(prefix) or value == prefix.rstrip("/") for prefix in allow)
+    if permission == "apt_repos":
+        return any(value.startswith(prefix) for prefix in allow)
+    raise ValueError(permission)
+
+
+def shell_commands(script):
+    """First word of each command in a simple shell line."""
+    commands = []
+    for segment in re.split(r"\|\||&&|[|;]", script):
+        try:
+            words = shlex.split(segment)
+        except ValueError:
+            continue
+        while words and "=" in words[0] and not words[0].startswith("/"):
+            words.pop(0)
+        if words:
+            commands.append(words[0])
+    return commands
@@ -0,0 +1,216 @@
+"""Per-step timing records and the per-app report built from them.
+
+A step record is one JSON object per line:
+
+    {"event": "step", "app": "gitlab", "run": "dry-run", "seq": 3,
+     "op": "run_command", "name": "gitlab-ctl reconfigure",
+     "start": 41.2, "duration": 312.9, "bytes": 0, "status": "ok", "exit": 0}
+
+start and duration are seconds from the start of the run; bytes is what the
+step downloaded or wrote. The dry-run stand-in emits these for every SDK
+call (with near-zero durations, since nothing executes), and
+load_records() also picks them out of a provisioning log with other lines
+mixed in. replay() lays the durations of a recorded run onto a fresh
+dry-run, so a changed script can be costed before it reaches a node.
+"""
+import json
+
+EVENT = "step"
+NAME_KEYS = ("argv", "packages", "url", "image", "dest", "path", "name", "script")
+NAME_WIDTH = 60
+
+
+def step_name(op, args):
+    """Short human-readable name for a step: its most telling argument."""
+    for key in NAME_KEYS:
+        value = args.get(key)
+        if value:
+            text = " ".join(map(str, value)) if isinstance(value, list) else str(value)
+            text = " ".join(text.split())
+            return text if len(text) <= NAME_WIDTH else text[:NAME_WIDTH - 3] + "..."
+    return op
+
+
+def make_record(app_id, run, seq, step, start, duration, nbytes):
+    status = step.get("status", "ok")
+    return {
+        "event": EVENT,
+        "app": app_id,
+        "run": run,
+        "seq": seq,
+        "op": step["op"],
+        "name": step_name(step["op"], step["args"]),
+        "start": round(start, 6),
+        "duration": round(duration, 6),
+        "bytes": nbytes,
+        "status": status,
+        "exit": 0 if status == "ok" else 1,
+    }
+
+
+def dump_records(records, f):
+    for record in records:
+        f.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def load_records(paths):
+    """Step records from JSONL files or logs; other lines are skipped."""
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                start = line.find("{")
+                if start < 0:
+                    continue
+                try:
+                    record = json.loads(line[start:])
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.get("event") == EVENT:
+                    records.append(record)
+    return records
+
+
+def by_app(records):
+    """{app: [records of its latest run, in seq order]}.
+
+    The latest run is the one an app's last record belongs to: logs are
+    appended to, and run ids need not sort in time order.
+    """
+    runs, latest = {}, {}
+    for record in records:
+        run = record.get("run", "")
+        runs.setdefault(record["app"], {}).setdefault(run, []).append(record)
+        latest[record["app"]] = run
+    return {app: sorted(app_runs[latest[app]], key=lambda r: r["seq"])
+            for app, app_runs in sorted(runs.items())}
+
+
+def critical_path(records):
+    """Longest chain of steps where each starts after the previous one ended.
+
+    Install scripts are sequential, so this is usually every step; steps a
+    script runs in the background overlap others and drop off the chain.
+    """
+    steps = sorted(records, key=lambda r: r["start"] + r["duration"])
+    best, prev = [], []
+    for i, step in enumerate(steps):
+        best.append(step["duration"])
+        prev.append(None)
+        for j in range(i):
+            before = steps[j]
+            if before["start"] + before["duration"] <= step["start"] + 1e-9 and \
+                    best[j] + step["duration"] > best[i]:
+                best[i], prev[i] = best[j] + step["duration"], j
+    if not steps:
+        return []
+    i = max(range(len(steps)), key=best.__getitem__)
+    chain = []
+    while i is not None:
+        chain.append(steps[i])
+        i = prev[i]
+    return chain[::-1]
+
+
+def app_report(records, timeout=None, top=5):
+    """Summary of one app's run: wall time, critical path, slowest steps."""
+    wall = max((r["start"] + r["duration"] for r in records), default=0.0) - \
+        min((r["start"] for r in records), default=0.0)
+    path = critical_path(records)
+    on_path = sum(r["duration"] for r in path)
+    slowest = sorted(records, key=lambda r: -r["duration"])[:top]
+    return {
+        "app": records[0]["app"] if records else "",
+        "steps": len(records),
+        "wall": wall,
+        "timeout": timeout,
+        "critical_path": path,
+        "critical_total": on_path,
+        "untracked": max(wall - on_path, 0.0),
+        "bytes": sum(r.get("bytes", 0) for r in records),
+        "failed": [r for r in records if r.get("status", "ok") != "ok"],
+        "slowest": [dict(r, share=r["duration"] / wall if wall else 0.0) for r in slowest],
+    }
+
+
+def _seconds(value):
+    return f"{value:.3f}s" if value < 10 else f"{value:.1f}s"
+
+
+def _size(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024 or unit == "MB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def format_report(report):
+    lines = [f"{report['app']}: {report['steps']} steps, wall {_seconds(report['wall'])}"]
+    if report["timeout"]:
+        lines[0] += f" ({report['wall'] / report['timeout']:.0%} of {report['timeout']}s timeout)"
+    lines.append(f"  critical path {len(report['critical_path'])} steps, "
+                 f"{_seconds(report['critical_total'])}; untracked {_seconds(report['untracked'])}; "
+                 f"{_size(report['bytes'])}")
+    for r in report["slowest"]:
+        lines.append(f"  {r['share']:>6.1%} {_seconds(r['duration']):>9}  #{r['seq']:<3} {r['op']:<20} {r['name']}")
+    for r in report["failed"]:
+        lines.append(f"  {r['status'].upper()} #{r['seq']} {r['op']} {r['name']} (exit {r.get('exit')})")
+    return "\n".join(lines)
+
+
+def _keyed(records):
+    """Records keyed by (op, name, occurrence) so runs with shifted seq still match."""
+    seen, keyed = {}, {}
+    for record in records:
+        base = (record["op"], record["name"])
+        seen[base] = seen.get(base, 0) + 1
+        keyed[base + (seen[base],)] = record
+    return keyed
+
+
+def compare(old, new):
+    """Per-step duration changes between two runs of one app.
+
+    Returns (key, old duration or None, new duration or None) rows in the
+    new run's order, followed by steps that only the old run had.
+    """
+    old_keyed, new_keyed = _keyed(old), _keyed(new)
+    rows = [(key, old_keyed[key]["duration"] if key in old_keyed else None, r["duration"])
+            for key, r in new_keyed.items()]
+    rows += [(key, r["duration"], None) for key, r in old_keyed.items() if key not in new_keyed]
+    return rows
+
+
+def format_compare(app_id, rows, threshold=0.0):
+    old_total = sum(o for _, o, _ in rows if o is not None)
+    new_total = sum(n for _, _, n in rows if n is not None)
+    lines = [f"{app_id}: {_seconds(old_total)} -> {_seconds(new_total)} ({new_total - old_total:+.1f}s)"]
+    for (op, name, _), old, new in rows:
+        if old is None:
+            lines.append(f"  {'new':>9} {_seconds(new):>9}  {op:<20} {name}")
+        elif new is None:
+            lines.append(f"  {_seconds(old):>9} {'removed':>9}  {op:<20} {name}")
+        elif abs(new - old) > threshold:
+            lines.append(f"  {_seconds(old):>9} {_seconds(new):>9}  {op:<20} {name} ({new - old:+.1f}s)")
+    return "\n".join(lines)
+
+
+def replay(current, past):
+    """Cost a fresh dry-run with a recorded run's durations.
+
+    Steps of the current script that match a recorded step take its
+    duration, bytes and status; new steps keep their dry-run values and are
+    marked "replayed": False. Start times are re-laid sequentially.
+    """
+    past_keyed = _keyed(past)
+    replayed, clock = [], 0.0
+    for key, record in _keyed(current).items():
+        source = past_keyed.get(key)
+        record = dict(record, replayed=source is not None)
+        if source is not None:
+            for field in ("duration", "bytes", "status", "exit"):
+                record[field] = source.get(field, record[field])
+        record["start"] = clock
+        clock += record["duration"]
+        replayed.append(record)
+    return replayed
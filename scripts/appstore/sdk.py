@@ -0,0 +1,274 @@
+"""BaseApp surface recorded into a plan instead of touching the system.
+
+Every SDK call becomes one plan step: {"op": ..., "args": {...}, "status": ...},
+and is timed into a step record (see profile.py).
+Permission checks run exactly as on a real node, and a denied operation
+raises PermissionDenied. Files the SDK would write are written under the
+sandbox root, so later reads (and the final file listing) see them. Commands,
+package installs, downloads and services are recorded, never executed.
+"""
+import functools
+import os
+import re
+import string
+import subprocess
+
+from .permissions import allowed, shell_commands
+
+# {{#name}}...{{/name}} keeps its body when the variable is truthy; a marker
+# alone on its line takes its newline with it
+SECTION_RE = re.compile(r"\{\{#(\w+)\}\}\n?(.*?)\{\{/\1\}\}\n?", re.DOTALL)
+MARKER_RE = re.compile(r"\{\{[#/^]\w*\}\}")
+
+
+class SDKError(Exception):
+    pass
+
+
+class PermissionDenied(SDKError):
+    pass
+
+
+class Inputs:
+    def __init__(self, values):
+        self._values = dict(values)
+
+    def _get(self, key, default):
+        value = self._values.get(key, default)
+        return default if value is None else value
+
+    def string(self, key, default=None):
+        value = self._get(key, default)
+        return "" if value is None else str(value)
+
+    def integer(self, key, default=None):
+        value = self._get(key, default)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise SDKError(f"input {key}: {value!r} is not an integer")
+
+    def boolean(self, key, default=None):
+        value = self._get(key, default)
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return bool(value)
+
+    def get(self, key, default=None):
+        return self._get(key, default)
+
+
+class Log:
+    def __init__(self, plan):
+        self._plan = plan
+
+    def _line(self, level, message):
+        self._plan.log.append(f"{level}: {message}")
+
+    def info(self, message):
+        self._line("info", message)
+
+    def warn(self, message):
+        self._line("warn", message)
+
+    warning = warn
+
+    def error(self, message):
+        self._line("error", message)
+
+    def debug(self, message):
+        self._line("debug", message)
+
+    def output(self, key, value):
+        self._plan.outputs[key] = value
+
+
+def _timed(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._ctx.timed(method, self, *args, **kwargs)
+    return wrapper
+
+
+class BaseApp:
+    def __init__(self, context):
+        self._ctx = context
+        self.inputs = Inputs(context.inputs)
+        self.log = Log(context.plan)
+
+    def install(self):
+        raise NotImplementedError
+
+    def configure(self):
+        pass
+
+    def uninstall(self):
+        pass
+
+    # ── Recording helpers ───────────────────────────────────────────
+
+    def _step(self, op, checks=(), **args):
+        """Record one operation after checking (permission, value) pairs."""
+        args = {k: v for k, v in args.items() if v is not None and v != {} and v != ()}
+        step = self._ctx.plan.add(op, args)
+        perms = self._ctx.permissions
+        for permission, value in checks:
+            if value is not None and not allowed(permission, value, perms.get(permission, [])):
+                step["status"] = "denied"
+                step["error"] = f"{value!r} not in permissions.{permission}"
+                raise PermissionDenied(f"{op}: {step['error']}")
+        return step
+
+    def _write(self, path, data, mode=None):
+        self._ctx.write_file(path, data, mode)
+
+    def _provision_path(self, name):
+        path = os.path.join(self._ctx.provision_dir, name)
+        if not os.path.isfile(path):
+            raise SDKError(f"provision file not found: {name}")
+        return path
+
+    def _substitute(self, text, variables, source):
+        def section(match):
+            if match.group(1) not in variables:
+                raise SDKError(f"{source}: no variable for section {match.group(1)!r}")
+            return match.group(2) if variables[match.group(1)] else ""
+
+        count = 1
+        while count:
+            text, count = SECTION_RE.subn(section, text)
+        leftover = MARKER_RE.search(text)
+        if leftover:
+            raise SDKError(f"{source}: unsupported or unbalanced template marker {leftover.group(0)}")
+        try:
+            return string.Template(text).substitute(**{k: str(v) for k, v in variables.items()})
+        except (KeyError, ValueError) as e:
+            raise SDKError(f"{source}: template substitution failed: {e}")
+
+    # ── Packages ────────────────────────────────────────────────────
+
+    @_timed
+    def pkg_install(self, *packages):
+        self._step("pkg_install", [("packages", p) for p in packages], packages=list(packages))
+
+    @_timed
+    def apt_install(self, *packages):
+        self._step("apt_install", [("packages", p) for p in packages], packages=list(packages))
+
+    @_timed
+    def pip_install(self, *packages, venv=None):
+        checks = [("pip", p) for p in packages] + [("paths", venv)]
+        self._step("pip_install", checks, packages=list(packages), venv=venv)
+
+    @_timed
+    def create_venv(self, path):
+        self._step("create_venv", [("paths", path)], path=path)
+        self._ctx.make_dir(path)
+
+    @_timed
+    def add_apt_repository(self, url, key_url=None, name=None, suite=None, components=None, **extra):
+        self._step("add_apt_repository", [("apt_repos", url), ("urls", key_url)],
+                   url=url, key_url=key_url, name=name, suite=suite, components=components, **extra)
+
+    # ── Files ───────────────────────────────────────────────────────
+
+    def provision_file(self, name):
+        with open(self._provision_path(name), encoding="utf-8") as f:
+            return f.read()
+
+    @_timed
+    def render_template(self, template, dest, mode=None, **variables):
+        self._step("render_template", [("paths", dest)], template=template, dest=dest, mode=mode,
+                   variables=sorted(variables))
+        text = self._substitute(self.provision_file(template), variables, template)
+        self._write(dest, text.encode("utf-8"), mode)
+
+    @_timed
+    def deploy_provision_file(self, name, dest, mode=None):
+        self._step("deploy_provision_file", [("paths", dest)], source=name, dest=dest, mode=mode)
+        with open(self._provision_path(name), "rb") as f:
+            self._write(dest, f.read(), mode)
+
+    @_timed
+    def write_config(self, path, content, mode=None, **variables):
+        self._step("write_config", [("paths", path)], path=path, mode=mode, variables=sorted(variables))
+        if variables:
+            content = self._substitute(content, variables, path)
+        self._write(path, content.encode("utf-8"), mode)
+
+    @_timed
+    def write_env_file(self, path, env, mode=None):
+        self._step("write_env_file", [("paths", path)], path=path, mode=mode, keys=sorted(env))
+        lines = "".join(f"{k}={v}\n" for k, v in env.items())
+        self._write(path, lines.encode("utf-8"), mode)
+
+    @_timed
+    def create_dir(self, path, owner=None, mode=None):
+        self._step("create_dir", [("paths", path)], path=path, owner=owner, mode=mode)
+        self._ctx.make_dir(path)
+
+    @_timed
+    def chown(self, path, owner, recursive=False):
+        self._step("chown", [("paths", path)], path=path, owner=owner, recursive=recursive or None)
+
+    @_timed
+    def download(self, url, dest, mode=None):
+        self._step("download", [("urls", url), ("paths", dest)], url=url, dest=dest, mode=mode)
+        self._write(dest, b"", mode)
+
+    @_timed
+    def pull_oci_binary(self, image, dest, tag="latest", **extra):
+        self._step("pull_oci_binary", [("paths", dest)], image=image, tag=tag, dest=dest, **extra)
+        self._write(dest, b"", "0755")
+
+    # ── Users, services, commands ───────────────────────────────────
+
+    @_timed
+    def create_user(self, name, system=False, home=None, shell=None):
+        self._step("create_user", [("users", name)], name=name, system=system or None, home=home, shell=shell)
+        if home:
+            self._ctx.make_dir(home)
+
+    @_timed
+    def create_service(self, name, exec_start=None, **options):
+        self._step("create_service", [("services", name)], name=name, exec_start=exec_start, **options)
+
+    @_timed
+    def enable_service(self, name):
+        self._step("enable_service", [("services", name)], name=name)
+
+    @_timed
+    def restart_service(self, name):
+        self._step("restart_service", [("services", name)], name=name)
+
+    @_timed
+    def run_command(self, cmd, check=True, input_text=None, cwd=None, env=None, **extra):
+        argv = [str(c) for c in cmd] if isinstance(cmd, (list, tuple)) else [str(cmd)]
+        self._step("run_command", [("commands", argv[0])], argv=argv, check=check,
+                   input=input_text is not None or None, cwd=cwd, env=sorted(env) if env else None)
+        return subprocess.CompletedProcess(argv, 0, stdout="", stderr="")
+
+    @_timed
+    def run_shell(self, script, check=True, **extra):
+        self._step("run_shell", [("commands", c) for c in shell_commands(script)], script=script, check=check)
+        return subprocess.CompletedProcess(script, 0, stdout="", stderr="")
+
+    @_timed
+    def run_installer_script(self, url, *args, **extra):
+        self._step("run_installer_script", [("installer_scripts", url)], url=url, args=list(args))
+
+    # ── Networking and status ───────────────────────────────────────
+
+    @_timed
+    def wait_for_http(self, url, timeout=60, interval=1):
+        self._step("wait_for_http", [], url=url, timeout=timeout)
+        return True
+
+    @_timed
+    def status_page(self, port, title=None, api_url=None, fields=None, **extra):
+        self._step("status_page", [], port=port, title=title, api_url=api_url,
+                   fields=sorted(fields) if fields else None)
+
+    @_timed
+    def disable_ipv6(self):
+        self._step("disable_ipv6")
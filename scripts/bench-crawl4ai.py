@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""Load-test a running Crawl4AI server against a local fixture site.
+
+Starts a small fixture HTTP server (static articles, JavaScript-rendered
+pages, slow endpoints and a sitemap), drives the Crawl4AI API at each
+requested concurrency level and reports throughput, latency percentiles,
+peak memory and browser count. Results are written as JSON so runs can be
+compared between catalog versions:
+
+    ./scripts/bench-crawl4ai.py --server http://10.0.0.50:11235 \\
+        --fixture-url http://10.0.0.10:8765 --out bench.json
+    ./scripts/bench-crawl4ai.py --server ... --compare bench.json
+
+The fixture site must be reachable from the Crawl4AI container; use
+--fixture-url to advertise this machine's address. --fixture-only serves
+the site without running any scenario, for scripts/perf-check.py. Only the
+standard library is needed.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+CATALOG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIXTURE_PAGES = 200
+LOREM = (
+    "Proxmox containers share the host kernel which keeps them light enough to run "
+    "dozens of services on a single node while still isolating their filesystems "
+    "and process trees from one another. "
+)
+
+# name -> (endpoint, fixture path template, render_mode)
+SCENARIOS = {
+    "static": ("/crawl", "/static/{n}", "auto"),
+    "static-browser": ("/crawl", "/static/{n}", "browser"),
+    "spa": ("/crawl", "/spa/{n}", "auto"),
+    "slow": ("/crawl", "/slow/{n}?ms=750", "auto"),
+    "cached": ("/crawl", "/static/0", "auto"),
+    "batch": ("/crawl/batch", "/static/{n}", "auto"),
+    "site": ("/site", "/static/0", "auto"),
+}
+
+
+# ── Fixture site ────────────────────────────────────────────────────
+
+def static_page(n):
+    links = "".join(f'<li><a href="/static/{(n * 7 + i) % FIXTURE_PAGES}">Page {i}</a></li>'
+                    for i in range(1, 6))
+    body = "".join(f"<p>{LOREM * 4}</p>" for _ in range(6))
+    return (f"<!doctype html><html><head><title>Static {n}</title></head><body>"
+            f"<h1>Static article {n}</h1>{body}<ul>{links}</ul></body></html>")
+
+
+def spa_page(n):
+    return ("<!doctype html><html><head><title>SPA</title></head><body>"
+            "<noscript>You need to enable JavaScript to run this app.</noscript>"
+            '<div id="root"></div><script>'
+            f"document.getElementById('root').innerHTML = '<h1>SPA {n}</h1>' + "
+            f"'<p>{LOREM * 4}</p>'.repeat(6);"
+            "</script></body></html>")
+
+
+def sitemap(base):
+    urls = "".join(f"<url><loc>{base}/static/{n}</loc></url>" for n in range(FIXTURE_PAGES))
+    return ('<?xml version="1.0" encoding="UTF-8"?>'
+            f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>')
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    base_url = ""
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        segments = parts.path.strip("/").split("/")
+        kind, n = segments[0], int(segments[1]) if len(segments) > 1 and segments[1].isdigit() else 0
+        if kind == "static":
+            self._send(static_page(n))
+        elif kind == "spa":
+            self._send(spa_page(n))
+        elif kind == "slow":
+            time.sleep(int(parse_qs(parts.query).get("ms", ["500"])[0]) / 1000)
+            self._send(static_page(n))
+        elif kind == "sitemap.xml":
+            self._send(sitemap(self.base_url), "application/xml")
+        else:
+            self.send_error(404)
+
+    def _send(self, text, ctype="text/html; charset=utf-8"):
+        data = text.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fixture(host, port, advertised):
+    server = ThreadingHTTPServer((host, port), FixtureHandler)
+    FixtureHandler.base_url = advertised or f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, FixtureHandler.base_url
+
+
+# ── Client side ─────────────────────────────────────────────────────
+
+def post(url, payload, timeout):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(),
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return resp.read()
+
+
+def post_stream(url, payload, timeout):
+    """POST and read an NDJSON stream; returns (seconds to first line, line count)."""
+    start = time.perf_counter()
+    first, lines = None, 0
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(),
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        for line in resp:
+            if line.strip():
+                lines += 1
+                if first is None:
+                    first = time.perf_counter() - start
+    return first, lines
+
+
+def parse_metrics(text):
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#") and "{" not in line:
+            name, _, value = line.partition(" ")
+            try:
+                values[name] = float(value)
+            except ValueError:
+                pass
+    return values
+
+
+class MetricsSampler(threading.Thread):
+    """Polls /metrics and keeps the peak memory and browser count."""
+
+    def __init__(self, server, interval=0.5):
+        super().__init__(daemon=True)
+        self.url = server + "/metrics"
+        self.interval = interval
+        self.peaks = {"rss": 0.0, "browser_rss": 0.0, "browsers": 0.0}
+        self.available = True
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            try:
+                with urllib.request.urlopen(self.url, timeout=5) as resp:
+                    m = parse_metrics(resp.read().decode())
+            except (OSError, urllib.error.URLError):
+                self.available = False
+                return
+            for key, metric in (("rss", "process_resident_memory_bytes"),
+                                ("browser_rss", "crawl4ai_browser_resident_memory_bytes"),
+                                ("browsers", "crawl4ai_browsers_active")):
+                self.peaks[key] = max(self.peaks[key], m.get(metric, 0.0))
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join(timeout=5)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def run_scenario(name, server, fixture, concurrency, requests, timeout, batch_size):
+    endpoint, path, mode = SCENARIOS[name]
+    options = {"render_mode": mode, "bypass_cache": name != "cached"}
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            if endpoint == "/crawl":
+                body = json.loads(post(server + endpoint, {"url": fixture + path.format(n=i % FIXTURE_PAGES),
+                                                           **options}, timeout))
+                ok = body.get("success", False)
+            elif endpoint == "/crawl/batch":
+                urls = [fixture + path.format(n=(i * batch_size + k) % FIXTURE_PAGES)
+                        for k in range(batch_size)]
+                _, lines = post_stream(server + endpoint, {"urls": urls, "options": options}, timeout)
+                ok = lines == batch_size
+            else:
+                _, lines = post_stream(server + endpoint, {
+                    "url": fixture + path.format(n=i), "max_depth": 3, "max_pages": batch_size,
+                    "options": options}, timeout)
+                ok = lines > 0
+        except (OSError, urllib.error.URLError, ValueError):
+            ok = False
+        return time.perf_counter() - start, ok
+
+    if name == "cached":
+        one(0)  # warm the cache entry every request will hit
+
+    sampler = MetricsSampler(server)
+    sampler.start()
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(one, range(requests)))
+    wall = time.perf_counter() - wall
+    sampler.stop()
+
+    latencies = sorted(t * 1000 for t, ok in samples if ok)
+    pages = len(latencies) * (batch_size if endpoint != "/crawl" else 1)
+    return {
+        "scenario": name,
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": sum(1 for _, ok in samples if not ok),
+        "wall_sec": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else 0.0,
+        "pages_per_sec": round(pages / wall, 3) if wall else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "mean": round(statistics.fmean(latencies), 3) if latencies else None,
+            "max": latencies[-1] if latencies else None,
+        },
+        "peak_rss_mb": round(sampler.peaks["rss"] / 2**20, 1) if sampler.available else None,
+        "peak_browser_rss_mb": round(sampler.peaks["browser_rss"] / 2**20, 1) if sampler.available else None,
+        "peak_browsers": int(sampler.peaks["browsers"]) if sampler.available else None,
+    }
+
+
+# ── Reporting ───────────────────────────────────────────────────────
+
+def run_meta(server):
+    meta = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "server": server}
+    try:
+        meta["commit"] = subprocess.run(["git", "-C", CATALOG_DIR, "rev-parse", "--short", "HEAD"],
+                                        capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    try:
+        with open(os.path.join(CATALOG_DIR, "apps/crawl4ai/app.yml")) as f:
+            meta["app_version"] = next(line.split(":", 1)[1].strip() for line in f
+                                       if line.startswith("version:"))
+    except (OSError, StopIteration):
+        pass
+    return meta
+
+
+def print_table(results):
+    print(f"{'scenario':<16}{'conc':>5}{'req/s':>9}{'pages/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+          f"{'err':>5}{'rss MB':>9}{'brw MB':>9}{'brw':>5}")
+    for r in results:
+        lat = r["latency_ms"]
+        fmt = lambda v: f"{v:.0f}" if isinstance(v, (int, float)) else "-"  # noqa: E731
+        print(f"{r['scenario']:<16}{r['concurrency']:>5}{r['throughput_rps']:>9.2f}"
+              f"{r['pages_per_sec']:>9.2f}{fmt(lat['p50']):>9}{fmt(lat['p95']):>9}{fmt(lat['p99']):>9}"
+              f"{r['errors']:>5}{fmt(r['peak_rss_mb']):>9}{fmt(r['peak_browser_rss_mb']):>9}"
+              f"{fmt(r['peak_browsers']):>5}")
+
+
+def compare(baseline, results, tolerance):
+    """Print changes against a baseline run; returns the list of regressions."""
+    base = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = base.get((r["scenario"], r["concurrency"]))
+        if not old:
+            continue
+        checks = [
+            ("throughput_rps", old["throughput_rps"], r["throughput_rps"], True),
+            ("p95_ms", old["latency_ms"]["p95"], r["latency_ms"]["p95"], False),
+            ("peak_rss_mb", old.get("peak_rss_mb"), r.get("peak_rss_mb"), False),
+        ]
+        for metric, before, after, higher_is_better in checks:
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            flag = "REGRESSION" if worse > tolerance else ""
+            print(f"{r['scenario']:<16}c={r['concurrency']:<4}{metric:<16}{before:>10.2f} -> "
+                  f"{after:>10.2f} ({change:+.1%}) {flag}")
+            if flag:
+                regressions.append((r["scenario"], r["concurrency"], metric))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--server", default="http://127.0.0.1:11235", help="Crawl4AI API base URL")
+    parser.add_argument("--scenarios", default="static,spa,slow,cached,batch",
+                        help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=50, help="requests per scenario and level")
+    parser.add_argument("--batch-size", type=int, default=20, help="URLs per batch / pages per site crawl")
+    parser.add_argument("--timeout", type=float, default=300, help="per-request timeout in seconds")
+    parser.add_argument("--fixture-host", default="0.0.0.0", help="address the fixture site binds to")
+    parser.add_argument("--fixture-port", type=int, default=8765)
+    parser.add_argument("--fixture-url", help="fixture base URL as seen from the Crawl4AI server")
+    parser.add_argument("--fixture-only", action="store_true",
+                        help="serve the fixture site until interrupted and run nothing else")
+    parser.add_argument("--out", help="write results JSON to this file")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed relative regression before failing (default 0.10)")
+    args = parser.parse_args()
+
+    server = args.server.rstrip("/")
+    fixture_server, fixture = start_fixture(args.fixture_host, args.fixture_port, args.fixture_url)
+    if args.fixture_only:
+        print(f"Serving fixture site at {fixture}", file=sys.stderr)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            fixture_server.shutdown()
+        return
+    results = []
+    try:
+        for name in args.scenarios.split(","):
+            if name not in SCENARIOS:
+                parser.error(f"unknown scenario {name}")
+            for level in (int(c) for c in args.concurrency.split(",")):
+                print(f"Running {name} at concurrency {level}...", file=sys.stderr)
+                results.append(run_scenario(name, server, fixture, level, args.requests,
+                                            args.timeout, args.batch_size))
+    finally:
+        fixture_server.shutdown()
+
+    report = {"meta": run_meta(server), "results": results}
+    print_table(results)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
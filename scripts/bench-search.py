@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Benchmark the catalog search index against a linear scan.
+
+Creates a synthetic catalog (5,000 apps by default), builds the search
+index, then times a mixed query workload (whole words, multi-word queries,
+type-ahead prefixes and facet filters) against the index and against a
+naive scan over every manifest's fields:
+
+    ./scripts/bench-search.py
+    ./scripts/bench-search.py --apps 20000 --queries 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog.cache import ManifestCache  # noqa: E402
+from catalog.index import dumps  # noqa: E402
+from catalog.search import SearchIndex, build_search_index, facet_values, tokenize  # noqa: E402
+from catalog.synthetic import make_catalog  # noqa: E402
+
+CATALOG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def linear_search(apps, query, filters):
+    """Reference implementation: scan every app's fields for every term."""
+    terms = tokenize(query)
+    hits = []
+    for app in apps:
+        facets = facet_values(app)
+        if any(value not in facets[facet] for facet, value in filters.items()):
+            continue
+        text = " ".join([app["name"], app["description"], app["overview"],
+                         " ".join(app["tags"]), " ".join(app["categories"])]).lower()
+        if all(t in text for t in terms):
+            hits.append(app["id"])
+    return hits
+
+
+def make_workload(index, rng, count):
+    terms = [t for t in index.postings if len(t) > 3]
+    categories = list(index.facet_counts["category"])
+    workload = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            workload.append((rng.choice(terms), {}))
+        elif kind == 1:
+            workload.append((" ".join(rng.sample(terms, 2)), {}))
+        elif kind == 2:
+            term = rng.choice(terms)
+            workload.append((term[:rng.randint(2, len(term) - 1)], {}))
+        else:
+            workload.append((rng.choice(terms), {"category": rng.choice(categories)}))
+    return workload
+
+
+def timed(fn, workload):
+    samples = []
+    for query, filters in workload:
+        start = time.perf_counter()
+        fn(query, filters)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {"p50": samples[len(samples) // 2], "p99": samples[int(len(samples) * 0.99) - 1],
+            "mean": statistics.fmean(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--catalog", help="existing catalog to use instead of a synthetic one")
+    parser.add_argument("--apps", type=int, default=5000, help="synthetic catalog size (default 5000)")
+    parser.add_argument("--queries", type=int, default=1000, help="queries in the workload (default 1000)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = args.catalog
+        if not catalog:
+            catalog = os.path.join(tmp, "catalog")
+            start = time.perf_counter()
+            make_catalog(CATALOG_DIR, catalog, args.apps, args.seed)
+            print(f"Synthetic catalog: {args.apps} apps ({time.perf_counter() - start:.1f}s)")
+
+        apps, _ = ManifestCache(os.path.join(tmp, "manifests.json")).load_apps(catalog)
+
+        start = time.perf_counter()
+        data = dumps(build_search_index(apps))
+        build_ms = (time.perf_counter() - start) * 1000
+        path = os.path.join(tmp, "search.json")
+        with open(path, "wb") as f:
+            f.write(data)
+        start = time.perf_counter()
+        index = SearchIndex.load(path)
+        load_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Index: {len(apps)} apps, {len(index.postings)} terms, {len(index.prefixes)} prefixes, "
+          f"{len(data) / 2**20:.1f} MiB, built in {build_ms:.0f}ms, loaded in {load_ms:.0f}ms")
+
+    workload = make_workload(index, random.Random(args.seed), args.queries)
+    indexed = timed(lambda q, f: index.search(q, 20, f), workload)
+    suggest = timed(lambda q, f: index.suggest(q), workload)
+    linear = timed(lambda q, f: linear_search(apps, q, f), workload[:max(1, args.queries // 10)])
+
+    print(f"{'':<14}{'p50 us':>10}{'p99 us':>10}{'mean us':>10}")
+    for name, t in (("index search", indexed), ("suggest", suggest), ("linear scan", linear)):
+        print(f"{name:<14}{t['p50']:>10.1f}{t['p99']:>10.1f}{t['mean']:>10.1f}")
+    print(f"Speedup (mean): {linear['mean'] / indexed['mean']:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
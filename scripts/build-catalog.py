@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Generate catalog outputs from every apps/*/app.yml.
+
+Builds the catalog index (dist/catalog.json, dist/catalog.bin; see
+scripts/catalog/index.py for the binary layout), per-app bundles
+(dist/bundles/, bundles.json, bundles-delta.json), icons (dist/icons/,
+icons.json), the search index (dist/search.json) and the app table in
+README.md. Parsed manifests and icons are cached by content hash under
+dist/.cache, so only changed apps are reprocessed, and unchanged outputs
+are not rewritten.
+Run manually via: ./scripts/build-catalog.py [--timings]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog.build import OUTPUTS, build  # noqa: E402
+from catalog.index import changed_apps  # noqa: E402
+from catalog.manifest import ManifestError  # noqa: E402
+
+CATALOG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--catalog", default=CATALOG_DIR, help="catalog root (default: this repo)")
+    parser.add_argument("--out", help="output directory (default: <catalog>/dist)")
+    parser.add_argument("--outputs", default=",".join(OUTPUTS),
+                        help=f"comma-separated subset of: {', '.join(OUTPUTS)}")
+    parser.add_argument("--jobs", type=int, help="parallel workers for cold parses (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and rebuild the manifest cache")
+    parser.add_argument("--timings", action="store_true", help="print per-phase timings")
+    args = parser.parse_args()
+
+    outputs = [o for o in args.outputs.split(",") if o]
+    for o in outputs:
+        if o not in OUTPUTS:
+            parser.error(f"unknown output {o}")
+    out_dir = args.out or os.path.join(args.catalog, "dist")
+    cache_path = os.path.join(out_dir, ".cache", "manifests.json")
+    if args.no_cache and os.path.exists(cache_path):
+        os.remove(cache_path)
+
+    previous = None
+    try:
+        with open(os.path.join(out_dir, "catalog.json")) as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        apps, stats, written, timer = build(args.catalog, out_dir, outputs, args.jobs, cache_path)
+    except (ManifestError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Loaded {stats['apps']} apps: {stats['parsed']} parsed, "
+          f"{stats['stat_hits'] + stats['hash_hits']} cached")
+    if "index" in outputs:
+        diff = changed_apps(previous, {"apps": apps})
+        print("Catalog index: " + (", ".join(f"{len(v)} {k}" for k, v in diff.items() if v) or "no changes"))
+    for path in written:
+        print(f"{'Updated' if os.path.exists(path) else 'Removed'} {os.path.relpath(path, args.catalog)}")
+    if not written:
+        print("All outputs up to date")
+    if args.timings:
+        print(timer.report())
+
+
+if __name__ == "__main__":
+    main()
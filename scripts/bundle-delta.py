@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Compare two bundle manifests and list the bundles a node must fetch.
+
+    ./scripts/bundle-delta.py old/bundles.json dist/bundles.json
+    ./scripts/bundle-delta.py --verify dist/bundles.json
+
+--verify checks every bundle listed in a manifest against its sha256.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog.bundles import delta, load_manifest, verify  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("manifests", nargs="+", help="OLD NEW, or a single manifest with --verify")
+    parser.add_argument("--verify", action="store_true", help="verify bundle files against their hashes")
+    parser.add_argument("--out", help="write the delta JSON to this file instead of stdout")
+    args = parser.parse_args()
+
+    if args.verify:
+        path = args.manifests[-1]
+        manifest = load_manifest(path)
+        if manifest is None:
+            parser.error(f"cannot read {path}")
+        root = os.path.dirname(os.path.abspath(path))
+        bad = [app_id for app_id, b in sorted(manifest["bundles"].items())
+               if not os.path.exists(os.path.join(root, b["file"]))
+               or not verify(os.path.join(root, b["file"]), b["sha256"])]
+        for app_id in bad:
+            print(f"FAIL {app_id}: {manifest['bundles'][app_id]['file']}")
+        print(f"Verified {len(manifest['bundles']) - len(bad)}/{len(manifest['bundles'])} bundles")
+        sys.exit(1 if bad else 0)
+
+    if len(args.manifests) != 2:
+        parser.error("expected OLD and NEW manifests")
+    old, new = (load_manifest(p) for p in args.manifests)
+    if new is None:
+        parser.error(f"cannot read {args.manifests[1]}")
+    result = json.dumps(delta(old, new), indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(result + "\n")
+    else:
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
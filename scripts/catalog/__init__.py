@@ -0,0 +1,4 @@
+"""Build tooling for the PVE App Store catalog.
+
+Run the entry scripts in scripts/ rather than importing this package directly.
+"""
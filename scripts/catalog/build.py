@@ -0,0 +1,166 @@
+"""Catalog generator: loads manifests incrementally and writes the outputs.
+
+Outputs:
+    icons   dist/icons/<sha256>.{png,svg}, sprite sheets and dist/icons.json;
+            each app's entry is also attached to its index record. Files no
+            longer referenced are deleted
+    index   dist/catalog.json and dist/catalog.bin
+    search  dist/search.json, the precomputed search index
+    bundles dist/bundles/<sha256>.tar.gz per app, dist/bundles.json, and
+            dist/bundles-delta.json against the previous bundles.json
+    readme  the app table between the BEGIN/END_APP_TABLE markers in README.md
+
+An output file is only rewritten when its bytes change, so mtimes stay put
+and CI sees no diff when nothing changed.
+"""
+import os
+import time
+
+from . import bundles, icons
+from .cache import ManifestCache
+from .index import build_index, dumps, encode_binary
+from .search import build_search_index
+
+BEGIN_MARKER = "<!-- BEGIN_APP_TABLE -->"
+END_MARKER = "<!-- END_APP_TABLE -->"
+OUTPUTS = ("icons", "index", "search", "bundles", "readme")
+
+
+class Timings:
+    """Wall-clock time per phase, in milliseconds."""
+
+    def __init__(self):
+        self.phases = {}
+        self._current = None
+
+    def __call__(self, phase):
+        self._current = phase
+        return self
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = (time.perf_counter() - self._start) * 1000
+        self.phases[self._current] = self.phases.get(self._current, 0.0) + elapsed
+        return False
+
+    def report(self):
+        total = sum(self.phases.values())
+        parts = "  ".join(f"{name} {ms:.1f}ms" for name, ms in self.phases.items())
+        return f"{parts}  (total {total:.1f}ms)"
+
+
+def write_if_changed(path, data):
+    """Write bytes to path unless the file already holds them; returns True if written."""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+def render_table(apps):
+    lines = ["| App | Version | Category | OS | GPU |",
+             "|-----|---------|----------|----|-----|"]
+    for app in apps:
+        gpu = ", ".join(app["gpu"]["supported"]) or "-"
+        lines.append(f"| [{app['name']}](apps/{app['id']}/) | {app['version'] or '?'} | "
+                     f"{', '.join(app['categories'])} | {app['lxc']['ostemplate'] or '?'} | {gpu} |")
+    return "\n".join(lines)
+
+
+def update_readme(text, table):
+    """Replace the table between the markers; raises ValueError if they are missing."""
+    start = text.find(BEGIN_MARKER)
+    end = text.find(END_MARKER, start)
+    if start < 0 or end < 0:
+        raise ValueError(f"Missing {BEGIN_MARKER} / {END_MARKER} markers in README.md")
+    head = text[:start + len(BEGIN_MARKER)]
+    return f"{head}\n\n{table}\n{text[end:]}"
+
+
+def build(catalog_dir, out_dir, outputs=OUTPUTS, jobs=None, cache_path=None):
+    """Run the generator; returns (apps, cache stats, written paths, Timings).
+
+    Written paths include files deleted because no output references them.
+    """
+    timer = Timings()
+    cache_path = cache_path or os.path.join(out_dir, ".cache", "manifests.json")
+    cache = ManifestCache(cache_path)
+    apps, stats = cache.load_apps(catalog_dir, jobs=jobs, timer=timer)
+    written = []
+
+    if "icons" in outputs:
+        with timer("icons"):
+            icon_manifest, files = icons.build_icons(
+                apps, catalog_dir, os.path.join(os.path.dirname(cache_path), "icons"))
+        with timer("write"):
+            icon_dir = os.path.join(out_dir, "icons")
+            os.makedirs(icon_dir, exist_ok=True)
+            files["icons.json"] = dumps(icon_manifest)
+            for rel, data in files.items():
+                path = os.path.join(out_dir, rel)
+                if write_if_changed(path, data):
+                    written.append(path)
+            # Hashed names change with content; drop files from earlier builds
+            for name in sorted(os.listdir(icon_dir)):
+                if f"icons/{name}" not in files:
+                    os.remove(os.path.join(icon_dir, name))
+                    written.append(os.path.join(icon_dir, name))
+        # Copy rather than mutate: the records are shared with the manifest cache
+        apps = [dict(a, icons=icon_manifest["icons"].get(a["id"])) for a in apps]
+
+    if "index" in outputs:
+        with timer("index"):
+            index = build_index(apps)
+            files = {"catalog.json": dumps(index), "catalog.bin": encode_binary(index)}
+        with timer("write"):
+            os.makedirs(out_dir, exist_ok=True)
+            for name, data in files.items():
+                path = os.path.join(out_dir, name)
+                if write_if_changed(path, data):
+                    written.append(path)
+
+    if "search" in outputs:
+        with timer("search"):
+            data = dumps(build_search_index(apps))
+        with timer("write"):
+            os.makedirs(out_dir, exist_ok=True)
+            path = os.path.join(out_dir, "search.json")
+            if write_if_changed(path, data):
+                written.append(path)
+
+    if "bundles" in outputs:
+        manifest_path = os.path.join(out_dir, "bundles.json")
+        previous = bundles.load_manifest(manifest_path)
+        with timer("bundles"):
+            manifest, packed = bundles.build_bundles(apps, catalog_dir, out_dir, previous)
+            written.extend(packed)
+        with timer("write"):
+            # The delta always describes this build: empty when nothing changed
+            files = {manifest_path: dumps(manifest),
+                     os.path.join(out_dir, "bundles-delta.json"): dumps(bundles.delta(previous, manifest))}
+            for path, data in files.items():
+                if write_if_changed(path, data):
+                    written.append(path)
+
+    if "readme" in outputs:
+        readme = os.path.join(catalog_dir, "README.md")
+        with timer("readme"):
+            with open(readme, encoding="utf-8") as f:
+                text = update_readme(f.read(), render_table(apps))
+        with timer("write"):
+            if write_if_changed(readme, text.encode("utf-8")):
+                written.append(readme)
+
+    with timer("cache"):
+        cache.save()
+    return apps, stats, written, timer
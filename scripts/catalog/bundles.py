@@ -0,0 +1,101 @@
+"""Deterministic per-app bundles, a bundle manifest and deltas between versions.
+
+Each apps/<id>/ directory is packed into a gzip'd tarball whose bytes depend
+only on the file contents: entries are sorted, and owners, timestamps and
+the gzip header are fixed. The same app therefore always produces the same
+bundle, and the bundle is named by its sha256 (dist/bundles/<sha256>.tar.gz),
+so nodes can cache bundles forever and verify them with a single hash.
+
+dist/bundles.json maps each app id to its bundle. delta() compares two of
+these manifests and lists only the bundles a node has to fetch.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import tarfile
+
+from .manifest import app_files
+
+BUNDLE_FORMAT = 1
+
+
+def pack(app_id, app_dir):
+    """Return the bundle bytes for one app; files are stored under <app_id>/."""
+    raw = io.BytesIO()
+    with tarfile.open(fileobj=raw, mode="w", format=tarfile.PAX_FORMAT) as tar:
+        for rel in app_files(app_dir):
+            path = os.path.join(app_dir, rel)
+            with open(path, "rb") as f:
+                data = f.read()
+            info = tarfile.TarInfo(f"{app_id}/{rel.replace(os.sep, '/')}")
+            info.size = len(data)
+            info.mode = 0o755 if os.access(path, os.X_OK) else 0o644
+            info.mtime = 0
+            info.uid = info.gid = 0
+            info.uname = info.gname = ""
+            tar.addfile(info, io.BytesIO(data))
+    out = io.BytesIO()
+    with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=9, mtime=0, filename="") as gz:
+        gz.write(raw.getvalue())
+    return out.getvalue()
+
+
+def build_bundles(apps, catalog_dir, out_dir, previous=None):
+    """Write any missing bundles and return (bundle manifest, newly written paths).
+
+    Apps whose content hash matches the previous manifest reuse their bundle
+    without re-packing, as long as the file is still on disk.
+    """
+    bundle_dir = os.path.join(out_dir, "bundles")
+    os.makedirs(bundle_dir, exist_ok=True)
+    old = (previous or {}).get("bundles", {})
+    bundles, written = {}, []
+    for app in sorted(apps, key=lambda a: a["id"]):
+        prev = old.get(app["id"])
+        if prev and prev["app_hash"] == app["hash"] and os.path.exists(os.path.join(out_dir, prev["file"])):
+            bundles[app["id"]] = dict(prev, version=app["version"])
+            continue
+        data = pack(app["id"], os.path.join(catalog_dir, "apps", app["id"]))
+        digest = hashlib.sha256(data).hexdigest()
+        rel = f"bundles/{digest}.tar.gz"
+        path = os.path.join(out_dir, rel)
+        if not os.path.exists(path):
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+            written.append(path)
+        bundles[app["id"]] = {"version": app["version"], "app_hash": app["hash"],
+                              "file": rel, "sha256": digest, "size": len(data)}
+    return {"format": BUNDLE_FORMAT, "bundles": bundles}, written
+
+
+def delta(old, new):
+    """Bundles to fetch and app ids to drop when moving from `old` to `new`."""
+    old_bundles = (old or {}).get("bundles", {})
+    new_bundles = new["bundles"]
+    fetch = {app_id: b for app_id, b in new_bundles.items()
+             if old_bundles.get(app_id, {}).get("sha256") != b["sha256"]}
+    return {
+        "format": BUNDLE_FORMAT,
+        "fetch": fetch,
+        "remove": sorted(old_bundles.keys() - new_bundles.keys()),
+        "download_bytes": sum(b["size"] for b in fetch.values()),
+    }
+
+
+def verify(path, sha256):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest() == sha256
+
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,129 @@
+"""Incremental manifest loading backed by a content-hash cache.
+
+Each app is checked in three steps, cheapest first:
+
+1. stat signature (relative path, size, mtime of every file) unchanged:
+   reuse the cached record without reading anything;
+2. content hash unchanged (files touched but identical): reuse the record;
+3. otherwise re-parse. Cold runs parse in a process pool, because YAML
+   parsing is CPU-bound.
+
+The cache is keyed on the source of manifest.py as well, so changing the
+normalizer invalidates every entry.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from . import manifest
+from .manifest import app_dirs, app_files, content_hash, load_app
+
+CACHE_FORMAT = 1
+# Below this many misses the process pool costs more than it saves
+PARALLEL_MIN = 16
+
+
+def _normalizer_version():
+    with open(manifest.__file__, "rb") as f:
+        return f"{CACHE_FORMAT}:{hashlib.sha256(f.read()).hexdigest()[:16]}"
+
+
+def stat_signature(app_dir):
+    h = hashlib.sha256()
+    for rel in app_files(app_dir):
+        st = os.stat(os.path.join(app_dir, rel))
+        h.update(f"{rel}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def _load_entry(item):
+    app_id, app_dir, sig = item
+    return {"sig": sig, "record": load_app(app_id, app_dir)}
+
+
+class ManifestCache:
+    def __init__(self, path):
+        self.path = path
+        self.version = _normalizer_version()
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") == self.version:
+                self.entries = data["apps"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": self.version, "apps": self.entries}, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def load_apps(self, catalog_dir, jobs=None, timer=None):
+        """Return (records sorted by id, stats dict)."""
+        timer = timer or _NullTimer()
+        stats = {"apps": 0, "stat_hits": 0, "hash_hits": 0, "parsed": 0, "removed": 0}
+
+        with timer("scan"):
+            dirs = app_dirs(catalog_dir)
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                sigs = list(pool.map(lambda d: stat_signature(d[1]), dirs))
+
+        pending = []
+        for (app_id, app_dir), sig in zip(dirs, sigs):
+            cached = self.entries.get(app_id)
+            if cached and cached["sig"] == sig:
+                stats["stat_hits"] += 1
+            else:
+                pending.append((app_id, app_dir, sig))
+
+        with timer("hash"):
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                hashes = list(pool.map(lambda p: content_hash(p[1]), pending))
+        to_parse = []
+        for (app_id, app_dir, sig), digest in zip(pending, hashes):
+            cached = self.entries.get(app_id)
+            if cached and cached["record"]["hash"] == digest:
+                cached["sig"] = sig
+                stats["hash_hits"] += 1
+                self.dirty = True
+            else:
+                to_parse.append((app_id, app_dir, sig))
+
+        with timer("parse"):
+            if len(to_parse) >= PARALLEL_MIN and (jobs or os.cpu_count() or 1) > 1:
+                with ProcessPoolExecutor(max_workers=jobs) as pool:
+                    loaded = list(pool.map(_load_entry, to_parse, chunksize=32))
+            else:
+                loaded = [_load_entry(item) for item in to_parse]
+        for (app_id, _, _), entry in zip(to_parse, loaded):
+            self.entries[app_id] = entry
+        stats["parsed"] = len(loaded)
+        self.dirty = self.dirty or bool(loaded)
+
+        live = {app_id for app_id, _ in dirs}
+        for app_id in [k for k in self.entries if k not in live]:
+            del self.entries[app_id]
+            stats["removed"] += 1
+            self.dirty = True
+
+        stats["apps"] = len(dirs)
+        return [self.entries[app_id]["record"] for app_id, _ in dirs], stats
+
+
+class _NullTimer:
+    def __call__(self, phase):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
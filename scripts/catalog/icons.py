@@ -0,0 +1,268 @@
+"""Icon pipeline: normalized sizes, lossless compression, hashed names, sprites.
+
+For every app with a local icon.svg or icon.png:
+
+- SVGs are minified: editor metadata (Inkscape, Sodipodi, RDF), comments
+  and whitespace are removed. The drawing itself is left untouched.
+- PNGs are resized to TARGET_SIZES, then recompressed losslessly:
+  ancillary text/time chunks are dropped and the image data is re-deflated
+  at maximum compression, keeping the result only if it is smaller.
+- Output files are named by the sha256 of their bytes (dist/icons/<hash>.png),
+  so they can be cached forever.
+- Sprite sheets bundle every icon into one request per format: an SVG sheet
+  of <symbol> elements and a PNG sheet at SPRITE_SIZE. Per-app coordinates
+  go in dist/icons.json and in the catalog index.
+
+Processed bytes are cached by the sha256 of their source (and of this
+file), so warm builds skip resizing and recompression entirely.
+
+PNG icons need Pillow; without it the build fails rather than ship
+unresized icons and no PNG sprite.
+"""
+import hashlib
+import io
+import math
+import os
+import re
+import struct
+import zlib
+import xml.etree.ElementTree as ET
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+ICONS_FORMAT = 2
+TARGET_SIZES = (32, 64, 128)
+SPRITE_SIZE = 64
+ICON_NAMES = ("icon.svg", "icon.png")
+
+SVG_NS = "http://www.w3.org/2000/svg"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+EDITOR_NAMESPACES = (
+    "http://www.inkscape.org/namespaces/inkscape",
+    "http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd",
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "http://purl.org/dc/elements/1.1/",
+    "http://creativecommons.org/ns#",
+    "http://www.openswatchbook.org/uri/2009/osb",
+)
+ET.register_namespace("", SVG_NS)
+ET.register_namespace("xlink", XLINK_NS)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Metadata chunks that do not affect how the image renders
+PNG_DROP_CHUNKS = {b"tEXt", b"zTXt", b"iTXt", b"tIME", b"eXIf", b"pHYs"}
+
+
+class IconCache:
+    """Processed icon bytes under DIR, keyed by what produced them.
+
+    Entries not used by a build are deleted when it finishes, so the cache
+    holds exactly one catalog's worth of icons.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(__file__, "rb") as f:
+            self.version = hashlib.sha256(f.read()).hexdigest()[:16]
+        self.used = set()
+
+    def get(self, variant, source, produce):
+        key = hashlib.sha256(f"{self.version}:{variant}:".encode() + source).hexdigest()
+        self.used.add(key)
+        if self.directory:
+            path = os.path.join(self.directory, key)
+            try:
+                with open(path, "rb") as f:
+                    return f.read()
+            except FileNotFoundError:
+                pass
+        data = produce()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        return data
+
+    def prune(self):
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name not in self.used:
+                os.remove(os.path.join(self.directory, name))
+
+
+def find_icon(app_dir):
+    for name in ICON_NAMES:
+        if os.path.isfile(os.path.join(app_dir, name)):
+            return name
+    return None
+
+
+# ── SVG ─────────────────────────────────────────────────────────────
+
+def _namespace(tag):
+    return tag[1:].split("}", 1)[0] if tag.startswith("{") else ""
+
+
+def optimize_svg(data):
+    root = ET.fromstring(data)
+    for parent in root.iter():
+        for child in list(parent):
+            if _namespace(child.tag) in EDITOR_NAMESPACES or child.tag == f"{{{SVG_NS}}}metadata":
+                parent.remove(child)
+        for attr in list(parent.attrib):
+            if _namespace(attr) in EDITOR_NAMESPACES:
+                del parent.attrib[attr]
+        if parent.text and not parent.text.strip():
+            parent.text = None
+        if parent.tail and not parent.tail.strip():
+            parent.tail = None
+        for attr in ("d", "points", "transform", "style"):
+            if attr in parent.attrib:
+                parent.attrib[attr] = " ".join(parent.attrib[attr].split())
+    return ET.tostring(root, encoding="utf-8", xml_declaration=False)
+
+
+def svg_symbol(app_id, data):
+    """Turn an optimized SVG into a <symbol> with ids prefixed by the app id."""
+    text = data.decode("utf-8")
+    root = ET.fromstring(text)
+    view_box = root.get("viewBox")
+    if not view_box:
+        width, height = (re.match(r"[\d.]+", root.get(a, "") or "0") for a in ("width", "height"))
+        view_box = f"0 0 {width.group(0) if width else 0} {height.group(0) if height else 0}"
+    inner = re.sub(r"^<svg[^>]*>|</svg>\s*$", "", text.strip())
+    for ident in set(re.findall(r'\bid="([^"]+)"', inner)):
+        escaped = re.escape(ident)
+        inner = re.sub(rf'\bid="{escaped}"', f'id="{app_id}-{ident}"', inner)
+        inner = re.sub(rf"url\(#{escaped}\)", f"url(#{app_id}-{ident})", inner)
+        inner = re.sub(rf'href="#{escaped}"', f'href="#{app_id}-{ident}"', inner)
+    return f'<symbol id="{app_id}" viewBox="{view_box}">{inner}</symbol>'
+
+
+# ── PNG ─────────────────────────────────────────────────────────────
+
+def _png_chunks(data):
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("not a PNG file")
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        yield kind, data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+
+
+def _chunk(kind, body):
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+
+def png_size(data):
+    for kind, body in _png_chunks(data):
+        if kind == b"IHDR":
+            return struct.unpack(">II", body[:8])
+    raise ValueError("PNG without IHDR")
+
+
+def optimize_png(data):
+    """Losslessly shrink a PNG: drop metadata chunks and re-deflate IDAT."""
+    chunks = [(k, b) for k, b in _png_chunks(data) if k not in PNG_DROP_CHUNKS]
+    idat = zlib.decompress(b"".join(b for k, b in chunks if k == b"IDAT"))
+    out, wrote_idat = [PNG_SIGNATURE], False
+    for kind, body in chunks:
+        if kind == b"IDAT":
+            if not wrote_idat:
+                out.append(_chunk(b"IDAT", zlib.compress(idat, 9)))
+                wrote_idat = True
+        else:
+            out.append(_chunk(kind, body))
+    result = b"".join(out)
+    return result if len(result) < len(data) else data
+
+
+def resize_png(data, size):
+    """Fit the image in a size x size square, centred on a transparent canvas."""
+    img = Image.open(io.BytesIO(data)).convert("RGBA")
+    img.thumbnail((size, size), Image.LANCZOS)
+    canvas = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    canvas.paste(img, ((size - img.width) // 2, (size - img.height) // 2))
+    out = io.BytesIO()
+    canvas.save(out, "PNG", optimize=True)
+    return out.getvalue()
+
+
+# ── Pipeline ────────────────────────────────────────────────────────
+
+def _emit(data, ext, files):
+    rel = f"icons/{hashlib.sha256(data).hexdigest()[:20]}.{ext}"
+    files[rel] = data
+    return rel
+
+
+def _sprite_sheet(tiles):
+    cols = math.ceil(math.sqrt(len(tiles)))
+    rows = math.ceil(len(tiles) / cols)
+    sheet = Image.new("RGBA", (cols * SPRITE_SIZE, rows * SPRITE_SIZE), (0, 0, 0, 0))
+    for i, tile in enumerate(tiles):
+        sheet.paste(Image.open(io.BytesIO(tile)), ((i % cols) * SPRITE_SIZE, (i // cols) * SPRITE_SIZE))
+    out = io.BytesIO()
+    sheet.save(out, "PNG", optimize=True)
+    return optimize_png(out.getvalue())
+
+
+def build_icons(apps, catalog_dir, cache_dir=None):
+    """Process every local icon; returns (icons manifest, {relative path: bytes}).
+
+    Raises ValueError if an app has a PNG icon and Pillow is not installed.
+    """
+    cache = IconCache(cache_dir)
+    files, icons, symbols, rasters = {}, {}, [], []
+    for app in sorted(apps, key=lambda a: a["id"]):
+        app_dir = os.path.join(catalog_dir, "apps", app["id"])
+        name = find_icon(app_dir)
+        if not name:
+            continue
+        with open(os.path.join(app_dir, name), "rb") as f:
+            source = f.read()
+        entry = {"source": f"apps/{app['id']}/{name}", "files": []}
+        if name.endswith(".svg"):
+            svg = cache.get("svg", source, lambda: optimize_svg(source))
+            entry["files"].append({"type": "svg", "file": _emit(svg, "svg", files)})
+            symbols.append(svg_symbol(app["id"], svg))
+            entry["sprite"] = {"sheet": "svg", "symbol": app["id"]}
+        else:
+            if Image is None:
+                raise ValueError(f"{entry['source']}: PNG icons need Pillow (pip install Pillow), "
+                                 f"or leave icons out of --outputs")
+            for size in TARGET_SIZES:
+                png = cache.get(f"png{size}", source, lambda: optimize_png(resize_png(source, size)))
+                entry["files"].append({"type": "png", "width": size, "height": size,
+                                       "file": _emit(png, "png", files)})
+            rasters.append((app["id"], cache.get(f"tile{SPRITE_SIZE}", source,
+                                                 lambda: resize_png(source, SPRITE_SIZE))))
+        icons[app["id"]] = entry
+
+    sprites = {}
+    if symbols:
+        sheet = (f'<svg xmlns="{SVG_NS}" xmlns:xlink="{XLINK_NS}" style="display:none">'
+                 + "".join(symbols) + "</svg>").encode("utf-8")
+        sprites["svg"] = {"file": _emit(sheet, "svg", files)}
+    if rasters:
+        cols = math.ceil(math.sqrt(len(rasters)))
+        for i, (app_id, _) in enumerate(rasters):
+            icons[app_id]["sprite"] = {"sheet": f"png{SPRITE_SIZE}",
+                                       "x": (i % cols) * SPRITE_SIZE, "y": (i // cols) * SPRITE_SIZE,
+                                       "width": SPRITE_SIZE, "height": SPRITE_SIZE}
+        tiles = [tile for _, tile in rasters]
+        sheet = cache.get(f"sprite{SPRITE_SIZE}", b"".join(hashlib.sha256(t).digest() for t in tiles),
+                          lambda: _sprite_sheet(tiles))
+        width, height = png_size(sheet)
+        sprites[f"png{SPRITE_SIZE}"] = {"file": _emit(sheet, "png", files),
+                                        "width": width, "height": height}
+
+    cache.prune()
+    manifest = {"format": ICONS_FORMAT, "sprites": sprites, "icons": icons}
+    return manifest, files
@@ -0,0 +1,83 @@
+"""Compiled catalog index: every normalized manifest in one versioned file.
+
+The JSON form is canonical (sorted keys, no whitespace) so identical catalogs
+produce byte-identical files. The binary form is a fixed header followed by
+the same JSON, zlib-compressed:
+
+    magic     4s   b"PVEC"
+    format    H    INDEX_FORMAT
+    apps      I    number of apps
+    hash      32s  catalog hash (raw sha256)
+    length    I    length of the uncompressed JSON
+    payload   ...  zlib(JSON)
+
+A client can read the first 46 bytes to check whether its copy is current
+before downloading or decompressing the rest.
+"""
+import hashlib
+import json
+import struct
+import zlib
+
+INDEX_FORMAT = 1
+MAGIC = b"PVEC"
+HEADER = struct.Struct("<4sHI32sI")
+
+
+def catalog_hash(apps):
+    """sha256 over the sorted "id:hash" lines of every app."""
+    lines = "".join(f"{a['id']}:{a['hash']}\n" for a in sorted(apps, key=lambda a: a["id"]))
+    return hashlib.sha256(lines.encode()).hexdigest()
+
+
+def build_index(apps):
+    apps = sorted(apps, key=lambda a: a["id"])
+    return {
+        "format": INDEX_FORMAT,
+        "catalog_hash": catalog_hash(apps),
+        "app_count": len(apps),
+        "apps": apps,
+    }
+
+
+def dumps(index):
+    return json.dumps(index, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def encode_binary(index):
+    payload = dumps(index)
+    header = HEADER.pack(MAGIC, index["format"], index["app_count"],
+                         bytes.fromhex(index["catalog_hash"]), len(payload))
+    return header + zlib.compress(payload, 9)
+
+
+def read_header(data):
+    """Parse the binary header; returns (format, app_count, catalog_hash)."""
+    if len(data) < HEADER.size:
+        raise ValueError("truncated catalog index")
+    magic, fmt, count, digest, _ = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a catalog index")
+    if fmt != INDEX_FORMAT:
+        raise ValueError(f"unsupported catalog index format {fmt}")
+    return fmt, count, digest.hex()
+
+
+def decode_binary(data):
+    read_header(data)
+    _, _, _, _, length = HEADER.unpack_from(data)
+    payload = zlib.decompress(data[HEADER.size:])
+    if len(payload) != length:
+        raise ValueError("corrupt catalog index payload")
+    return json.loads(payload)
+
+
+def changed_apps(old_index, new_index):
+    """App ids added, changed or removed between two indexes."""
+    old = {a["id"]: a["hash"] for a in (old_index or {}).get("apps", [])}
+    new = {a["id"]: a["hash"] for a in new_index["apps"]}
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "changed": sorted(k for k in new.keys() & old.keys() if new[k] != old[k]),
+        "removed": sorted(old.keys() - new.keys()),
+    }
@@ -0,0 +1,241 @@
+"""Static permission check: install.py SDK calls against app.yml permissions.
+
+Each provision/install.py is parsed with ast, never executed. For every
+BaseApp method call with a permission-relevant argument, the argument is
+resolved statically where possible:
+
+- string literals, and f-strings or concatenations of them;
+- names assigned exactly once in the enclosing function or at module level;
+- anything built from inputs or other runtime values resolves to its literal
+  prefix (e.g. f"/etc/jellyfin/{name}" -> "/etc/jellyfin/"), or to nothing.
+
+Resolved values are then checked against the manifest's allowlist with the
+same rules the SDK stand-in enforces (appstore/permissions.py).
+Values that cannot be resolved are reported as unchecked rather than as
+violations.
+"""
+import ast
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from appstore.permissions import allowed, shell_commands
+
+from .manifest import ManifestError, app_dirs, load_app
+
+# Below this many apps the process pool costs more than it saves
+PARALLEL_MIN = 32
+
+# method -> [(argument, permission)]; an int argument is positional,
+# "*" is every positional argument, a str is a keyword
+RULES = {
+    "pkg_install": [("*", "packages")],
+    "apt_install": [("*", "packages")],
+    "pip_install": [("*", "pip"), ("venv", "paths")],
+    "create_venv": [(0, "paths")],
+    "create_dir": [(0, "paths")],
+    "chown": [(0, "paths")],
+    "write_config": [(0, "paths")],
+    "write_env_file": [(0, "paths")],
+    "render_template": [(1, "paths")],
+    "deploy_provision_file": [(1, "paths")],
+    "pull_oci_binary": [("dest", "paths")],
+    "download": [(0, "urls"), (1, "paths")],
+    "add_apt_repository": [(0, "apt_repos"), ("key_url", "urls")],
+    "run_installer_script": [(0, "installer_scripts")],
+    "create_service": [(0, "services")],
+    "enable_service": [(0, "services")],
+    "restart_service": [(0, "services")],
+    "create_user": [(0, "users")],
+    "run_command": [(0, "commands")],
+    "run_shell": [(0, "shell")],
+}
+# Methods whose first argument names a file that must exist in provision/
+PROVISION_SOURCES = ("render_template", "deploy_provision_file", "provision_file")
+
+
+class Prefix(str):
+    """A value known only up to this literal prefix."""
+
+
+class Finding:
+    __slots__ = ("app", "path", "line", "kind", "message")
+
+    def __init__(self, app, path, line, kind, message):
+        self.app, self.path, self.line, self.kind, self.message = app, path, line, kind, message
+
+    def __str__(self):
+        return f"{self.path}:{self.line}: {self.kind}: {self.message}"
+
+
+def _assignments(body, params=()):
+    """Names bound in a block, not descending into nested functions or classes.
+
+    Names bound exactly once by a plain assignment map to the assigned
+    expression; everything else (parameters, loop targets, reassignments)
+    maps to None, meaning unknown.
+    """
+    env = {name: None for name in params}
+
+    def bind(name, value=None):
+        env[name] = None if name in env else value
+
+    stack = list(body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    bind(target.id, node.value)
+                else:
+                    for n in ast.walk(target):
+                        if isinstance(n, ast.Name):
+                            bind(n.id)
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            bind(node.target.id, node.value)
+        elif isinstance(node, (ast.AugAssign, ast.For, ast.AsyncFor, ast.comprehension, ast.NamedExpr)):
+            for n in ast.walk(node.target):
+                if isinstance(n, ast.Name):
+                    bind(n.id)
+        elif isinstance(node, ast.withitem) and node.optional_vars is not None:
+            for n in ast.walk(node.optional_vars):
+                if isinstance(n, ast.Name):
+                    bind(n.id)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bind(node.name)
+        stack.extend(ast.iter_child_nodes(node))
+    return env
+
+
+def resolve(node, env):
+    """Resolve an expression to a str, a Prefix, or None."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.Name):
+        for scope in env:
+            if node.id in scope:
+                value = scope[node.id]
+                return resolve(value, env) if value is not None else None
+        return None
+    if isinstance(node, ast.JoinedStr):
+        out = ""
+        for part in node.values:
+            value = resolve(part, env) if isinstance(part, ast.Constant) else \
+                resolve(part.value, env) if part.format_spec is None else None
+            if value is None or isinstance(value, Prefix):
+                return Prefix(out + (value or ""))
+            out += value
+        return out
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left = resolve(node.left, env)
+        if left is None or isinstance(left, Prefix):
+            return left
+        right = resolve(node.right, env)
+        if right is None:
+            return Prefix(left)
+        return type(right)(left + right)
+    return None
+
+
+def _call_args(call, spec):
+    if spec == "*":
+        values = []
+        for arg in call.args:
+            if isinstance(arg, ast.Starred):
+                if isinstance(arg.value, (ast.List, ast.Tuple)):
+                    values.extend(arg.value.elts)
+                else:
+                    values.append(None)
+            else:
+                values.append(arg)
+        return values
+    if isinstance(spec, int):
+        return [call.args[spec]] if len(call.args) > spec and not isinstance(call.args[spec], ast.Starred) else []
+    return [kw.value for kw in call.keywords if kw.arg == spec]
+
+
+def check_app(app_id, app_dir):
+    """Return (findings, number of checked calls, number of unchecked values)."""
+    rel_script = os.path.join("apps", app_id, "provision", "install.py")
+    script = os.path.join(app_dir, "provision", "install.py")
+    try:
+        record = load_app(app_id, app_dir)
+    except ManifestError as e:
+        return [Finding(app_id, f"apps/{app_id}/app.yml", 0, "error", str(e))], 0, 0
+    if not os.path.isfile(script):
+        return [Finding(app_id, rel_script, 0, "error", "missing provision/install.py")], 0, 0
+    with open(script) as f:
+        source = f.read()
+    try:
+        tree = ast.parse(source, script)
+    except SyntaxError as e:
+        return [Finding(app_id, rel_script, e.lineno or 0, "error", f"syntax error: {e.msg}")], 0, 0
+
+    perms = record["permissions"]
+    provision_dir = os.path.join(app_dir, "provision")
+    module_env = _assignments(tree.body)
+    findings, checked, unchecked = [], 0, 0
+
+    def visit(body, env):
+        nonlocal checked, unchecked
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                params = [a.arg for a in node.args.posonlyargs + node.args.args + node.args.kwonlyargs]
+                params += [a.arg for a in (node.args.vararg, node.args.kwarg) if a]
+                visit(node.body, [_assignments(node.body, params)] + env)
+                continue
+            if isinstance(node, ast.ClassDef):
+                visit(node.body, [_assignments(node.body)] + env)
+                continue
+            for call in ast.walk(node):
+                if not (isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute)
+                        and isinstance(call.func.value, ast.Name) and call.func.value.id == "self"):
+                    continue
+                method = call.func.attr
+                if method in PROVISION_SOURCES and call.args:
+                    name = resolve(call.args[0], env)
+                    if isinstance(name, str) and not isinstance(name, Prefix) \
+                            and not os.path.isfile(os.path.join(provision_dir, name)):
+                        findings.append(Finding(app_id, rel_script, call.lineno, "error",
+                                                f"{method}: provision/{name} does not exist"))
+                for spec, permission in RULES.get(method, []):
+                    for arg in _call_args(call, spec):
+                        if method == "run_command" and isinstance(arg, (ast.List, ast.Tuple)):
+                            arg = arg.elts[0] if arg.elts else None
+                        value = resolve(arg, env) if arg is not None else None
+                        if permission == "shell":
+                            values = shell_commands(value) if isinstance(value, str) and \
+                                not isinstance(value, Prefix) else [None]
+                            permission = "commands"
+                        else:
+                            values = [value]
+                        for v in values:
+                            if v is None or (isinstance(v, Prefix) and (permission not in ("paths", "apt_repos")
+                                                                        or not v)):
+                                unchecked += 1
+                                continue
+                            checked += 1
+                            if not allowed(permission, v, perms[permission]):
+                                if isinstance(v, Prefix) and any(p.startswith(v) for p in perms[permission]):
+                                    unchecked += 1
+                                    continue
+                                shown = f"{v}..." if isinstance(v, Prefix) else v
+                                findings.append(Finding(app_id, rel_script, call.lineno, "error",
+                                                        f"{method}: {shown!r} not in permissions.{permission}"))
+
+    visit(tree.body, [module_env])
+    return findings, checked, unchecked
+
+
+def _check(item):
+    return item[0], check_app(*item)
+
+
+def check_catalog(catalog_dir, jobs=None, apps=None):
+    """Check every app (or the given ids); returns {app_id: (findings, checked, unchecked)}."""
+    items = [(app_id, app_dir) for app_id, app_dir in app_dirs(catalog_dir) if not apps or app_id in apps]
+    if len(items) >= PARALLEL_MIN and (jobs or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            return dict(pool.map(_check, items, chunksize=16))
+    return dict(map(_check, items))
@@ -0,0 +1,133 @@
+"""Load and normalize app manifests (apps/<id>/app.yml)."""
+import hashlib
+import os
+
+import yaml
+
+INPUT_TYPES = {"string", "number", "boolean", "select", "secret"}
+INPUT_FIELDS = ("key", "label", "type", "default", "required", "reconfigurable",
+                "group", "description", "help", "validation", "show_when")
+PERMISSION_KEYS = ("packages", "pip", "urls", "paths", "services", "users",
+                   "commands", "installer_scripts", "apt_repos")
+# libyaml's loader is several times faster; fall back to pure Python without it
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class ManifestError(Exception):
+    pass
+
+
+def app_dirs(catalog_dir):
+    """Sorted (app_id, app_dir) pairs for every app with an app.yml."""
+    apps_dir = os.path.join(catalog_dir, "apps")
+    return [(name, os.path.join(apps_dir, name)) for name in sorted(os.listdir(apps_dir))
+            if os.path.isfile(os.path.join(apps_dir, name, "app.yml"))]
+
+
+def app_files(app_dir):
+    """Every file belonging to an app, as sorted paths relative to app_dir."""
+    files = []
+    for root, dirs, names in os.walk(app_dir):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__" and not d.startswith("."))
+        for name in names:
+            if not name.startswith(".") and not name.endswith(".pyc"):
+                files.append(os.path.relpath(os.path.join(root, name), app_dir))
+    return sorted(files)
+
+
+def content_hash(app_dir):
+    """sha256 over the relative path and bytes of every file in the app."""
+    h = hashlib.sha256()
+    for rel in app_files(app_dir):
+        h.update(rel.replace(os.sep, "/").encode() + b"\0")
+        with open(os.path.join(app_dir, rel), "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
+
+
+def _list(value):
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def normalize_input(raw, app_id):
+    key = raw.get("key")
+    if not key:
+        raise ManifestError(f"{app_id}: input without a key")
+    inp = {field: raw[field] for field in INPUT_FIELDS if field in raw}
+    inp.setdefault("label", key)
+    inp.setdefault("type", "string")
+    inp.setdefault("required", False)
+    inp.setdefault("group", "General")
+    if inp["type"] not in INPUT_TYPES:
+        raise ManifestError(f"{app_id}: input {key} has unknown type {inp['type']!r}")
+    return inp
+
+
+def normalize(raw, app_id, app_dir):
+    """Fill defaults and flatten a parsed app.yml into the index record shape.
+
+    Every key is always present, so consumers never need to guess defaults.
+    """
+    if not isinstance(raw, dict):
+        raise ManifestError(f"{app_id}: app.yml is not a mapping")
+    if raw.get("id", app_id) != app_id:
+        raise ManifestError(f"{app_id}: id {raw['id']!r} does not match directory name")
+
+    lxc = raw.get("lxc") or {}
+    gpu = raw.get("gpu") or {}
+    provisioning = raw.get("provisioning") or {}
+    permissions = raw.get("permissions") or {}
+
+    icon = raw.get("icon")
+    for name in ("icon.svg", "icon.png"):
+        if not icon and os.path.isfile(os.path.join(app_dir, name)):
+            icon = f"apps/{app_id}/{name}"
+
+    return {
+        "id": app_id,
+        "name": str(raw.get("name", app_id)),
+        "version": str(raw.get("version", "")),
+        "description": (raw.get("description") or "").strip(),
+        "overview": (raw.get("overview") or "").strip(),
+        "categories": _list(raw.get("categories")),
+        "tags": _list(raw.get("tags")),
+        "homepage": raw.get("homepage"),
+        "license": raw.get("license"),
+        "maintainers": _list(raw.get("maintainers")),
+        "official": bool(raw.get("official", False)),
+        "icon": icon,
+        "readme": f"apps/{app_id}/README.md" if os.path.isfile(os.path.join(app_dir, "README.md")) else None,
+        "lxc": {
+            "ostemplate": lxc.get("ostemplate"),
+            "defaults": lxc.get("defaults") or {},
+            "extra_config": _list(lxc.get("extra_config")),
+        },
+        "inputs": [normalize_input(i, app_id) for i in raw.get("inputs") or []],
+        "outputs": list(raw.get("outputs") or []),
+        "volumes": list(raw.get("volumes") or []),
+        "permissions": {k: _list(permissions.get(k)) for k in PERMISSION_KEYS},
+        "provisioning": {
+            "script": provisioning.get("script", "provision/install.py"),
+            "timeout_sec": provisioning.get("timeout_sec"),
+            "redact_keys": _list(provisioning.get("redact_keys")),
+        },
+        "gpu": {
+            "supported": _list(gpu.get("supported")),
+            "required": bool(gpu.get("required", False)),
+            "profiles": _list(gpu.get("profiles")),
+        },
+    }
+
+
+def load_app(app_id, app_dir):
+    """Parse and normalize one app; the record includes its content hash."""
+    with open(os.path.join(app_dir, "app.yml")) as f:
+        try:
+            raw = yaml.load(f, Loader=SafeLoader)
+        except yaml.YAMLError as e:
+            raise ManifestError(f"{app_id}: invalid YAML: {e}") from e
+    record = normalize(raw, app_id, app_dir)
+    record["hash"] = content_hash(app_dir)
+    return record
@@ -0,0 +1,318 @@
+"""Performance acceptance checks declared in an app's test.yml.
+
+    performance:
+      port: "{{http_port}}"        # input placeholders, as in app.yml outputs
+      scheme: http                 # or https; certificates are not verified
+      healthy:                     # time-to-healthy after the service starts
+        path: /
+        within_sec: 5
+        service: nginx             # restarted first when run against a container
+      load:                        # one entry per endpoint
+        - path: /
+          concurrency: 8
+          requests: 2000
+          min_rps: 500
+          max_p95_ms: 50
+        # - path: /crawl           # $n is the request number, in path and body
+        #   method: POST
+        #   body: {url: "{{fixture}}/static/$n"}
+        #   expect: {success: true}  # fields the JSON response must hold
+      memory:                      # peak resident memory during the load
+        max_mb: 64
+      standin:                     # how to run the app locally, if it can be
+        serve: /var/www/html       # a directory from the app's dry-run root
+        # command: [prog, --port, $port]
+      fixture:                     # a local server the app fetches from, if any
+        command: [scripts/fixture, --port, $port, --url, $url]
+
+{{fixture}} is the fixture's base URL as seen from the target. Its command
+runs from the catalog root, on this machine.
+
+A Target knows where the service listens and, where it can, how to restart
+it and how much memory it uses: a container on this node (via pct and its
+cgroup) or a local stand-in process. Checks it cannot measure are skipped,
+never passed.
+"""
+import json
+import os
+import re
+import ssl
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+from .manifest import ManifestError, SafeLoader
+
+PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+LOAD_DEFAULTS = {"method": "GET", "status": 200, "concurrency": 4, "requests": 200, "timeout_sec": 10}
+SAMPLE_INTERVAL = 0.2
+# Apps under test commonly serve a self-signed certificate until a real one is issued
+UNVERIFIED_TLS = ssl.create_default_context()
+UNVERIFIED_TLS.check_hostname = False
+UNVERIFIED_TLS.verify_mode = ssl.CERT_NONE
+
+
+def load_checks(app_id, app_dir, inputs):
+    """The performance section of test.yml with placeholders resolved, or None."""
+    path = os.path.join(app_dir, "test.yml")
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        perf = (yaml.load(f, Loader=SafeLoader) or {}).get("performance")
+    if not perf:
+        return None
+
+    def resolve(value):
+        def sub(m):
+            if m.group(1) not in inputs:
+                raise ManifestError(f"{app_id}: test.yml performance: unknown input {{{{{m.group(1)}}}}}")
+            return str(inputs[m.group(1)])
+        return PLACEHOLDER.sub(sub, value) if isinstance(value, str) else value
+
+    checks = {
+        "port": int(resolve(perf.get("port", 80))),
+        "scheme": perf.get("scheme", "http"),
+        "healthy": perf.get("healthy"),
+        "load": [dict(LOAD_DEFAULTS, **_resolve_all(entry, resolve)) for entry in perf.get("load") or []],
+        "memory": perf.get("memory"),
+        "standin": perf.get("standin"),
+        "fixture": perf.get("fixture"),
+    }
+    if checks["fixture"] is not None and "command" not in checks["fixture"]:
+        raise ManifestError(f"{app_id}: test.yml performance.fixture needs a command")
+    for entry in checks["load"]:
+        if "path" not in entry:
+            raise ManifestError(f"{app_id}: test.yml performance.load entry without a path")
+    if checks["healthy"] is not None and "within_sec" not in checks["healthy"]:
+        raise ManifestError(f"{app_id}: test.yml performance.healthy needs within_sec")
+    if checks["memory"] is not None and "max_mb" not in checks["memory"]:
+        raise ManifestError(f"{app_id}: test.yml performance.memory needs max_mb")
+    return checks
+
+
+def _resolve_all(value, resolve):
+    if isinstance(value, dict):
+        return {k: _resolve_all(v, resolve) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve_all(v, resolve) for v in value]
+    return resolve(value)
+
+
+def _number(value, n):
+    """value with every "$n" replaced by the request number."""
+    if isinstance(value, dict):
+        return {k: _number(v, n) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_number(v, n) for v in value]
+    return value.replace("$n", str(n)) if isinstance(value, str) else value
+
+
+# ── Targets ─────────────────────────────────────────────────────────
+
+class Target:
+    """A running service: base URL plus optional restart and memory hooks."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def restart(self, service):
+        """Restart the service; returns the start time, or None if unsupported."""
+        return None
+
+    def memory(self):
+        """Current resident memory in bytes, or None if unknown."""
+        return None
+
+    def close(self):
+        pass
+
+
+class ContainerTarget(Target):
+    """An LXC container on this Proxmox node, addressed by CT ID."""
+
+    def __init__(self, base_url, ctid):
+        super().__init__(base_url)
+        self.ctid = ctid
+        self.cgroup = f"/sys/fs/cgroup/lxc/{ctid}/memory.current"
+
+    def restart(self, service):
+        script = f"rc-service {service} restart 2>/dev/null || systemctl restart {service}"
+        start = time.monotonic()
+        subprocess.run(["pct", "exec", str(self.ctid), "--", "sh", "-c", script], check=True,
+                       capture_output=True)
+        return start
+
+    def memory(self):
+        try:
+            with open(self.cgroup) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+
+class ProcessTarget(Target):
+    """A local stand-in process; memory is the RSS of it and its children."""
+
+    def __init__(self, base_url, argv, cwd=None):
+        super().__init__(base_url)
+        self.argv, self.cwd, self.proc = argv, cwd, None
+
+    def restart(self, service):
+        self.close()
+        start = time.monotonic()
+        self.proc = subprocess.Popen(self.argv, cwd=self.cwd, stdout=subprocess.DEVNULL,
+                                     stderr=subprocess.DEVNULL)
+        return start
+
+    def memory(self):
+        if self.proc is None:
+            return None
+        total, pids = 0, [self.proc.pid]
+        while pids:
+            pid = pids.pop()
+            try:
+                with open(f"/proc/{pid}/status") as f:
+                    total += next((int(line.split()[1]) * 1024 for line in f
+                                   if line.startswith("VmRSS:")), 0)
+                with open(f"/proc/{pid}/task/{pid}/children") as f:
+                    pids.extend(int(p) for p in f.read().split())
+            except OSError:
+                continue
+        return total
+
+    def close(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+            self.proc.wait(timeout=10)
+        self.proc = None
+
+
+class MemorySampler(threading.Thread):
+    def __init__(self, target):
+        super().__init__(daemon=True)
+        self.target = target
+        self.peak = None
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            value = self.target.memory()
+            if value is not None:
+                self.peak = max(self.peak or 0, value)
+            self._done.wait(SAMPLE_INTERVAL)
+
+    def stop(self):
+        self._done.set()
+        self.join(timeout=5)
+
+
+# ── Checks ──────────────────────────────────────────────────────────
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def request(url, method="GET", body=None, timeout=10, expect=None):
+    """HTTP status, or None on a connection error or a JSON body not matching expect."""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method,
+                                 headers={"Content-Type": "application/json"} if data else {})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout, context=UNVERIFIED_TLS) as resp:
+            payload = resp.read()
+            if expect:
+                try:
+                    got = json.loads(payload)
+                except ValueError:
+                    return None
+                if not isinstance(got, dict) or any(got.get(k) != v for k, v in expect.items()):
+                    return None
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (OSError, urllib.error.URLError):
+        return None
+
+
+def _result(check, measured, limit, unit, passed, detail=""):
+    status = "skip" if passed is None else ("pass" if passed else "fail")
+    return {"check": check, "measured": measured, "limit": limit, "unit": unit,
+            "status": status, "detail": detail}
+
+
+def check_healthy(target, spec):
+    url = target.base_url + spec.get("path", "/")
+    within, expect = spec["within_sec"], spec.get("status", 200)
+    start = target.restart(spec.get("service"))
+    if start is None:
+        return _result("healthy", None, within, "s", None, "cannot restart the service on this target")
+    deadline = start + max(within * 3, 30)
+    while time.monotonic() < deadline:
+        if request(url, timeout=2) == expect:
+            elapsed = round(time.monotonic() - start, 2)
+            return _result("healthy", elapsed, within, "s", elapsed <= within)
+        time.sleep(0.1)
+    return _result("healthy", None, within, "s", False, f"{url} not healthy after {deadline - start:.0f}s")
+
+
+def check_load(target, spec):
+    def one(n):
+        url = target.base_url + _number(spec["path"], n)
+        start = time.perf_counter()
+        status = request(url, spec["method"], _number(spec.get("body"), n), spec["timeout_sec"],
+                         spec.get("expect"))
+        return time.perf_counter() - start, status == spec["status"]
+
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=spec["concurrency"]) as executor:
+        samples = list(executor.map(one, range(spec["requests"])))
+    wall = time.perf_counter() - wall
+    latencies = sorted(t * 1000 for t, ok in samples if ok)
+    errors = len(samples) - len(latencies)
+    rps = round(len(latencies) / wall, 1) if wall else 0.0
+    p95 = round(percentile(latencies, 95), 2) if latencies else None
+    name = f"{spec['method']} {spec['path']}"
+    detail = f"c={spec['concurrency']} n={spec['requests']}" + (f", {errors} errors" if errors else "")
+    results = []
+    if "min_rps" in spec:
+        results.append(_result(f"{name} rps", rps, spec["min_rps"], "req/s",
+                               rps >= spec["min_rps"] and not errors, detail))
+    if "max_p95_ms" in spec:
+        results.append(_result(f"{name} p95", p95, spec["max_p95_ms"], "ms",
+                               p95 is not None and p95 <= spec["max_p95_ms"] and not errors, detail))
+    if not results:
+        results.append(_result(name, errors, 0, "errors", not errors, detail))
+    return results
+
+
+def run_checks(target, checks):
+    """Run one app's checks in order: healthy, then load with memory sampled."""
+    results = []
+    if checks["healthy"]:
+        results.append(check_healthy(target, checks["healthy"]))
+    elif isinstance(target, ProcessTarget):
+        target.restart(None)
+        check_healthy(target, {"within_sec": 30})
+    sampler = MemorySampler(target)
+    sampler.start()
+    try:
+        for spec in checks["load"]:
+            results.extend(check_load(target, spec))
+    finally:
+        sampler.stop()
+    if checks["memory"]:
+        limit = checks["memory"]["max_mb"]
+        if sampler.peak is None:
+            results.append(_result("memory", None, limit, "MB", None, "no memory source for this target"))
+        else:
+            peak = round(sampler.peak / 2**20, 1)
+            results.append(_result("memory", peak, limit, "MB", peak <= limit, "peak during load"))
+    return results
@@ -0,0 +1,182 @@
+"""Precomputed search index over the catalog.
+
+The build step tokenizes each app's name, tags, categories, description and
+overview into an inverted index (term -> [[doc, score], ...], best first).
+It also precomputes, for every term prefix, the top matching apps (so
+type-ahead is a single dict lookup) and the most common completions, plus
+the app list for every facet value (category, OS template, GPU). A query
+then costs a few lookups plus a merge over the matching postings, whatever
+the size of the catalog. Facet counts for a query are tallied over its
+matches, so they cost time linear in the number of matching apps; only the
+counts for the whole catalog are precomputed.
+
+Written as dist/search.json; load it with SearchIndex.load().
+"""
+import json
+import re
+from collections import Counter, defaultdict
+from itertools import chain
+
+SEARCH_FORMAT = 1
+FIELD_WEIGHTS = {"name": 10, "tags": 6, "categories": 4, "description": 2, "overview": 1}
+STOPWORDS = frozenset("a an and are as at be by for from in into is it of on or that the this to "
+                      "with your you can all any its".split())
+MIN_PREFIX = 1
+MAX_PREFIX = 12
+# Matches kept per prefix; type-ahead only ever shows the first few
+PREFIX_TOP = 20
+# Completions kept per prefix when a partly typed last word is expanded
+COMPLETIONS_TOP = 16
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def facet_values(app):
+    return {
+        "category": app["categories"],
+        "os": [app["lxc"]["ostemplate"] or "unknown"],
+        "gpu": app["gpu"]["supported"] or ["none"],
+    }
+
+
+def _field_text(app, field):
+    value = app[field]
+    return " ".join(value) if isinstance(value, list) else value
+
+
+def build_search_index(apps):
+    apps = sorted(apps, key=lambda a: a["id"])
+    scores = defaultdict(lambda: defaultdict(int))
+    for doc, app in enumerate(apps):
+        for field, weight in FIELD_WEIGHTS.items():
+            # Score presence per field, not frequency, so long overviews
+            # cannot outrank a name match
+            for term in set(tokenize(_field_text(app, field))):
+                scores[term][doc] += weight
+        for term in tokenize(app["id"].replace("-", " ")):
+            scores[term][doc] = max(scores[term][doc], FIELD_WEIGHTS["name"])
+
+    postings = {term: sorted(([d, s] for d, s in docs.items()), key=lambda p: (-p[1], p[0]))
+                for term, docs in scores.items()}
+
+    prefix_scores = defaultdict(lambda: defaultdict(int))
+    for term, plist in postings.items():
+        for n in range(MIN_PREFIX, min(len(term), MAX_PREFIX) + 1):
+            best = prefix_scores[term[:n]]
+            for doc, score in plist:
+                if score > best[doc]:
+                    best[doc] = score
+    prefixes = {p: sorted(([d, s] for d, s in docs.items()), key=lambda x: (-x[1], x[0]))[:PREFIX_TOP]
+                for p, docs in prefix_scores.items()}
+
+    by_frequency = sorted(postings, key=lambda t: (-len(postings[t]), t))
+    completions = defaultdict(list)
+    for term in by_frequency:
+        for n in range(MIN_PREFIX, min(len(term), MAX_PREFIX) + 1):
+            if len(completions[term[:n]]) < COMPLETIONS_TOP:
+                completions[term[:n]].append(term)
+
+    facets = defaultdict(lambda: defaultdict(list))
+    for doc, app in enumerate(apps):
+        for facet, values in facet_values(app).items():
+            for value in values:
+                facets[facet][value].append(doc)
+
+    return {
+        "format": SEARCH_FORMAT,
+        "docs": [{"id": a["id"], "name": a["name"], "version": a["version"],
+                  "description": a["description"], "icon": a["icon"], "facets": facet_values(a)}
+                 for a in apps],
+        "postings": postings,
+        "prefixes": prefixes,
+        "completions": dict(completions),
+        "facets": {f: dict(v) for f, v in facets.items()},
+    }
+
+
+class SearchIndex:
+    def __init__(self, data):
+        if data.get("format") != SEARCH_FORMAT:
+            raise ValueError(f"unsupported search index format {data.get('format')}")
+        self.docs = data["docs"]
+        self.postings = data["postings"]
+        self.prefixes = data["prefixes"]
+        self.completions = data["completions"]
+        self.facet_docs = {f: {v: set(docs) for v, docs in values.items()}
+                           for f, values in data["facets"].items()}
+        self.facet_counts = {f: {v: len(docs) for v, docs in values.items()}
+                             for f, values in data["facets"].items()}
+        self._doc_facets = [tuple((f, v) for f, values in d["facets"].items() for v in values)
+                            for d in self.docs]
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _allowed(self, filters):
+        allowed = None
+        for facet, value in (filters or {}).items():
+            docs = self.facet_docs.get(facet, {}).get(value, set())
+            allowed = docs if allowed is None else allowed & docs
+        return allowed
+
+    def search(self, query, limit=20, filters=None):
+        """Rank apps matching every query term; the last term also matches as a prefix.
+
+        Returns (results, facet counts over all matches). Each result is a doc
+        dict with an added "score". Counting walks every match once, so it is
+        linear in the number of matches rather than constant.
+        """
+        terms = tokenize(query)
+        if not terms and not filters:
+            ranked = [[d, 0] for d in range(min(limit, len(self.docs)))]
+            return [dict(self.docs[d], score=s) for d, s in ranked], self.facet_counts
+        allowed = self._allowed(filters)
+        if not terms:
+            docs = range(len(self.docs)) if allowed is None else sorted(allowed)
+            matches = {d: 0 for d in docs}
+        else:
+            matches = None
+            for i, term in enumerate(terms):
+                if i == len(terms) - 1 and term not in self.postings:
+                    scores = self._expand(term)
+                else:
+                    scores = dict(self.postings.get(term, []))
+                if matches is None:
+                    matches = scores
+                else:
+                    matches = {d: s + scores[d] for d, s in matches.items() if d in scores}
+                if not matches:
+                    break
+            if allowed is not None:
+                matches = {d: s for d, s in matches.items() if d in allowed}
+
+        ranked = sorted(matches.items(), key=lambda item: (-item[1], self.docs[item[0]]["id"]))
+        counts = defaultdict(dict)
+        for (facet, value), n in Counter(chain.from_iterable(self._doc_facets[d] for d in matches)).items():
+            counts[facet][value] = n
+        results = [dict(self.docs[d], score=s) for d, s in ranked[:limit]]
+        return results, dict(counts)
+
+    def _expand(self, prefix):
+        """Best score per app across the common completions of a partial word."""
+        scores = {}
+        for term in self.completions.get(prefix[:MAX_PREFIX], []):
+            if term.startswith(prefix):
+                for doc, score in self.postings[term]:
+                    if score > scores.get(doc, 0):
+                        scores[doc] = score
+        return scores
+
+    def suggest(self, prefix, limit=8):
+        """Type-ahead: best apps whose terms start with the typed text."""
+        terms = tokenize(prefix)
+        if not terms:
+            return []
+        if len(terms) > 1:
+            return self.search(prefix, limit)[0]
+        return [dict(self.docs[d], score=s) for d, s in self.prefixes.get(terms[0][:MAX_PREFIX], [])[:limit]]
@@ -0,0 +1,50 @@
+"""Synthetic catalogs for benchmarking the tooling at scale.
+
+Clones the real apps under new ids, varying names, tags and categories so
+indexes and search see a realistic spread of values.
+"""
+import os
+import random
+import shutil
+
+import yaml
+
+from .build import BEGIN_MARKER, END_MARKER
+from .manifest import app_dirs
+
+SafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+WORDS = ("media", "stream", "proxy", "backup", "sync", "monitor", "dns", "vpn", "git", "chat",
+         "wiki", "notes", "photo", "music", "books", "home", "mail", "auth", "metrics", "logs",
+         "search", "cache", "queue", "db", "office", "files", "dash", "feed", "ci", "voice")
+CATEGORIES = ("media", "networking", "tools", "ai", "web", "security", "development",
+              "automation", "backup", "utilities", "productivity", "monitoring")
+
+
+def make_catalog(source_dir, dest_dir, count, seed=0):
+    """Write a catalog of `count` apps to dest_dir, cloned from source_dir."""
+    rng = random.Random(seed)
+    templates = []
+    for app_id, app_dir in app_dirs(source_dir):
+        with open(os.path.join(app_dir, "app.yml")) as f:
+            templates.append((app_id, app_dir, yaml.safe_load(f)))
+
+    apps_dir = os.path.join(dest_dir, "apps")
+    shutil.rmtree(apps_dir, ignore_errors=True)
+    os.makedirs(apps_dir)
+    for i in range(count):
+        base_id, base_dir, raw = templates[i % len(templates)]
+        words = rng.sample(WORDS, 2)
+        app_id = f"{base_id}-{words[0]}-{i}"
+        manifest = dict(raw, id=app_id, name=f"{raw.get('name', base_id)} {words[0].title()} {i}")
+        manifest["tags"] = sorted(set(raw.get("tags") or []) | set(rng.sample(WORDS, 3)))
+        manifest["categories"] = rng.sample(CATEGORIES, rng.randint(1, 3))
+        manifest["description"] = f"{raw.get('description', '')} Tuned for {' and '.join(words)}."
+
+        app_dir = os.path.join(apps_dir, app_id)
+        shutil.copytree(base_dir, app_dir, ignore=shutil.ignore_patterns("__pycache__", "*.pyc"))
+        with open(os.path.join(app_dir, "app.yml"), "w") as f:
+            yaml.dump(manifest, f, Dumper=SafeDumper, sort_keys=False, allow_unicode=True)
+
+    with open(os.path.join(dest_dir, "README.md"), "w") as f:
+        f.write(f"# Synthetic catalog ({count} apps)\n\n{BEGIN_MARKER}\n{END_MARKER}\n")
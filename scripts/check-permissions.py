@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Check install.py SDK calls against each app's permissions, without running them.
+
+    ./scripts/check-permissions.py            # whole catalog
+    ./scripts/check-permissions.py gitlab swag
+
+Exits non-zero when any violation is found, so it can gate CI before a
+container is ever provisioned. See scripts/catalog/lint.py for the rules.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog.lint import check_catalog  # noqa: E402
+
+CATALOG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("apps", nargs="*", help="app ids to check (default: all)")
+    parser.add_argument("--catalog", default=CATALOG_DIR, help="catalog root (default: this repo)")
+    parser.add_argument("--jobs", type=int, help="parallel workers (default: CPU count)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = check_catalog(args.catalog, args.jobs, set(args.apps))
+    elapsed = (time.perf_counter() - start) * 1000
+
+    errors = checked = unchecked = 0
+    for app_id, (findings, app_checked, app_unchecked) in sorted(results.items()):
+        for finding in findings:
+            print(finding)
+        errors += len(findings)
+        checked += app_checked
+        unchecked += app_unchecked
+    print(f"Checked {len(results)} apps in {elapsed:.0f}ms: {checked} values checked, "
+          f"{unchecked} dynamic values skipped, {errors} violation(s)")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
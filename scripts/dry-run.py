@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Dry-run install scripts against the offline SDK stand-in.
+
+    ./scripts/dry-run.py                      # whole catalog, summary table
+    ./scripts/dry-run.py swag --json          # full plan for one app
+    ./scripts/dry-run.py --out plans/         # save one <app>.json per app
+    ./scripts/dry-run.py --diff plans/        # compare against saved plans
+    ./scripts/dry-run.py --against HEAD~1     # compare against another commit
+    ./scripts/dry-run.py gitlab --replay run.jsonl  # cost with recorded timings
+
+Inputs come from app.yml defaults, then the app's test.yml, then --input.
+Nothing is installed, downloaded or executed; see scripts/appstore/.
+--profile writes a step record per SDK call; --replay lays the durations of
+a recorded run (step records from a node) onto the current scripts and
+reports what changed, see scripts/profile-report.py.
+"""
+import argparse
+import difflib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from appstore import profile, run_app  # noqa: E402
+from catalog.manifest import app_dirs  # noqa: E402
+
+CATALOG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def dry_run_all(catalog_dir, apps, inputs, action, records=None):
+    plans, timings = {}, {}
+    for app_id, app_dir in app_dirs(catalog_dir):
+        if apps and app_id not in apps:
+            continue
+        plans[app_id], timings[app_id] = run_app(app_dir, inputs, action, records=records)
+    return plans, timings
+
+
+def replay_report(records, past_paths):
+    """Report each app as if its current steps took their recorded time."""
+    current, past = profile.by_app(records), profile.by_app(profile.load_records(past_paths))
+    for app_id, steps in current.items():
+        if app_id not in past:
+            print(f"{app_id}: no recorded run to replay")
+            continue
+        replayed = profile.replay(steps, past[app_id])
+        print(profile.format_report(profile.app_report(replayed)))
+        print(profile.format_compare(app_id, profile.compare(past[app_id], replayed), threshold=1.0))
+
+
+def plan_text(plan):
+    return json.dumps(plan, indent=2, sort_keys=True, default=str) + "\n"
+
+
+def diff_plans(old, new, old_label, new_label):
+    """Print a unified diff per app; returns the number of apps that differ."""
+    changed = 0
+    for app_id in sorted(old.keys() | new.keys()):
+        a = plan_text(old[app_id]).splitlines(keepends=True) if app_id in old else []
+        b = plan_text(new[app_id]).splitlines(keepends=True) if app_id in new else []
+        diff = list(difflib.unified_diff(a, b, f"{old_label}/{app_id}", f"{new_label}/{app_id}"))
+        if diff:
+            changed += 1
+            sys.stdout.writelines(diff)
+    return changed
+
+
+def load_saved(directory):
+    plans = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name)) as f:
+                plans[name[:-5]] = json.load(f)
+    return plans
+
+
+def plans_at(rev, apps, inputs, action):
+    """Dry-run the catalog as it was at a git revision."""
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = subprocess.run(["git", "-C", CATALOG_DIR, "archive", rev, "apps"],
+                                 capture_output=True, check=True).stdout
+        subprocess.run(["tar", "-x", "-C", tmp], input=archive, check=True)
+        return dry_run_all(tmp, apps, inputs, action)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("apps", nargs="*", help="app ids (default: all)")
+    parser.add_argument("--catalog", default=CATALOG_DIR, help="catalog root (default: this repo)")
+    parser.add_argument("--input", action="append", default=[], metavar="KEY=VALUE",
+                        help="override an input (repeatable)")
+    parser.add_argument("--action", default="install", choices=("install", "configure", "uninstall"))
+    parser.add_argument("--json", action="store_true", help="print full plans as JSON")
+    parser.add_argument("--out", help="write each plan to DIR/<app>.json")
+    parser.add_argument("--diff", metavar="DIR", help="diff against plans saved with --out")
+    parser.add_argument("--against", metavar="REV", help="diff against the catalog at a git revision")
+    parser.add_argument("--profile", metavar="FILE", help="write step records as JSONL ('-' for stdout)")
+    parser.add_argument("--replay", nargs="+", metavar="RECORDS",
+                        help="cost the current scripts with the durations of recorded runs")
+    args = parser.parse_args()
+
+    inputs = dict(kv.split("=", 1) for kv in args.input)
+    apps = set(args.apps)
+    records = []
+    plans, timings = dry_run_all(args.catalog, apps, inputs, args.action, records)
+
+    if args.profile == "-":
+        profile.dump_records(records, sys.stdout)
+        return
+    if args.profile:
+        with open(args.profile, "w") as f:
+            profile.dump_records(records, f)
+    if args.replay:
+        replay_report(records, args.replay)
+        return
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        for app_id, plan in plans.items():
+            with open(os.path.join(args.out, f"{app_id}.json"), "w") as f:
+                f.write(plan_text(plan))
+
+    if args.diff or args.against:
+        if args.diff:
+            old, label = load_saved(args.diff), args.diff
+        else:
+            old, label = plans_at(args.against, apps, inputs, args.action), args.against
+        if apps:
+            old = {k: v for k, v in old.items() if k in apps}
+        changed = diff_plans(old, plans, label, "current")
+        print(f"{changed} of {len(old.keys() | plans.keys())} plan(s) differ", file=sys.stderr)
+        sys.exit(1 if changed else 0)
+
+    if args.json:
+        print(plan_text(plans if len(plans) != 1 else next(iter(plans.values()))), end="")
+    else:
+        for app_id, plan in plans.items():
+            line = (f"{app_id:<18}{plan['result']:<9}{len(plan['steps']):>4} steps "
+                    f"{len(plan['files']):>4} files {timings[app_id] * 1000:>7.1f}ms")
+            print(line + (f"  {plan['error']}" if plan["error"] else ""))
+        print(f"Dry-ran {len(plans)} apps in {sum(timings.values()) * 1000:.0f}ms")
+    sys.exit(0 if all(p["result"] == "ok" for p in plans.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Run the performance checks apps declare in test.yml.
+
+    ./scripts/perf-check.py --standin                   # local stand-ins, whole catalog
+    ./scripts/perf-check.py homeassistant --target 10.0.0.51 --ctid 151
+    ./scripts/perf-check.py crawl4ai --target 10.0.0.50 --out perf.json
+
+--target checks an installed app at that address. With --ctid (run on the
+Proxmox node) the service is restarted inside the container to measure
+time-to-healthy, and memory is read from the container's cgroup. --standin
+runs each app locally instead, as described by its test.yml: a directory
+served from the app's dry-run root, or a command. A fixture the app fetches
+from is started on this machine and advertised at the address the target
+reaches it by. Checks a target cannot measure are reported as skipped.
+Exits non-zero if any check fails.
+"""
+import argparse
+import json
+import os
+import shlex
+import socket
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from appstore import run_app  # noqa: E402
+from appstore.dryrun import default_inputs  # noqa: E402
+from catalog.manifest import SafeLoader, app_dirs  # noqa: E402
+from catalog.perf import ContainerTarget, ProcessTarget, Target, load_checks, run_checks  # noqa: E402
+
+CATALOG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def local_address(host):
+    """This machine's address on the route to host."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.connect((host, 9))
+        return s.getsockname()[0]
+
+
+def start_fixture(fixture, port, url, catalog_dir):
+    """Run the fixture command and wait until it accepts connections."""
+    command = fixture["command"]
+    argv = shlex.split(command) if isinstance(command, str) else list(command)
+    argv = [str(a).replace("$port", str(port)).replace("$url", url) for a in argv]
+    proc = ProcessTarget(url, argv, cwd=catalog_dir)
+    proc.restart(None)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return proc
+        except OSError:
+            if proc.proc.poll() is not None:
+                break
+            time.sleep(0.1)
+    proc.close()
+    raise RuntimeError(f"fixture {argv[0]} did not start listening on port {port}")
+
+
+def standin_target(app_dir, standin, tmp):
+    """Start nothing yet; return a ProcessTarget that runs the app's stand-in."""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    if "serve" in standin:
+        root = os.path.join(tmp, os.path.basename(app_dir))
+        plan, _ = run_app(app_dir, keep_root=root)
+        if plan["result"] != "ok":
+            raise RuntimeError(f"dry-run {plan['result']}: {plan['error']}")
+        directory = os.path.join(root, standin["serve"].lstrip("/"))
+        argv = [sys.executable, "-m", "http.server", str(port), "--bind", "127.0.0.1",
+                "--directory", directory]
+        return ProcessTarget(base_url, argv)
+    command = standin["command"]
+    argv = shlex.split(command) if isinstance(command, str) else list(command)
+    argv = [str(a).replace("$port", str(port)) for a in argv]
+    return ProcessTarget(base_url, argv, cwd=app_dir)
+
+
+def skipped(checks, reason):
+    names = (["healthy"] if checks["healthy"] else []) + \
+        [f"{e['method']} {e['path']}" for e in checks["load"]] + (["memory"] if checks["memory"] else [])
+    return [{"check": n, "measured": None, "limit": None, "unit": "", "status": "skip", "detail": reason}
+            for n in names]
+
+
+def print_report(report):
+    print(f"{'app':<16}{'check':<28}{'measured':>12}{'limit':>10}  result")
+    for app_id, results in report.items():
+        for r in results:
+            measured = "-" if r["measured"] is None else f"{r['measured']} {r['unit']}"
+            limit = "-" if r["limit"] is None else str(r["limit"])
+            detail = f"  ({r['detail']})" if r["detail"] else ""
+            print(f"{app_id:<16}{r['check']:<28}{measured:>12}{limit:>10}  {r['status'].upper()}{detail}")
+    counts = {s: sum(r["status"] == s for rs in report.values() for r in rs) for s in ("pass", "fail", "skip")}
+    print(f"{counts['pass']} passed, {counts['fail']} failed, {counts['skip']} skipped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("apps", nargs="*", help="app ids (default: every app with checks)")
+    parser.add_argument("--catalog", default=CATALOG_DIR, help="catalog root (default: this repo)")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--target", metavar="HOST", help="address of the installed app")
+    mode.add_argument("--standin", action="store_true", help="run each app's local stand-in")
+    parser.add_argument("--ctid", type=int, help="with --target: container ID on this node")
+    parser.add_argument("--out", help="write the report as JSON")
+    args = parser.parse_args()
+    if args.ctid and not args.target:
+        parser.error("--ctid needs --target")
+
+    report = {}
+    with tempfile.TemporaryDirectory(prefix="perf-check-") as tmp:
+        for app_id, app_dir in app_dirs(args.catalog):
+            if args.apps and app_id not in args.apps:
+                continue
+            with open(os.path.join(app_dir, "app.yml")) as f:
+                manifest = yaml.load(f, Loader=SafeLoader)
+            fixture_port = free_port()
+            fixture_url = f"http://{local_address(args.target) if args.target else '127.0.0.1'}:{fixture_port}"
+            checks = load_checks(app_id, app_dir, dict(default_inputs(manifest, app_dir), fixture=fixture_url))
+            if checks is None:
+                continue
+            if args.target:
+                base_url = f"{checks['scheme']}://{args.target}:{checks['port']}"
+                target = ContainerTarget(base_url, args.ctid) if args.ctid else Target(base_url)
+            elif checks["standin"]:
+                try:
+                    target = standin_target(app_dir, checks["standin"], tmp)
+                except RuntimeError as e:
+                    report[app_id] = skipped(checks, f"stand-in failed: {e}")
+                    continue
+            else:
+                report[app_id] = skipped(checks, "no stand-in; live node only")
+                continue
+            fixture = None
+            try:
+                if checks["fixture"]:
+                    fixture = start_fixture(checks["fixture"], fixture_port, fixture_url, args.catalog)
+                report[app_id] = run_checks(target, checks)
+            except RuntimeError as e:
+                report[app_id] = skipped(checks, str(e))
+            finally:
+                target.close()
+                if fixture:
+                    fixture.close()
+
+    if not report:
+        sys.exit("no performance checks declared")
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+    sys.exit(1 if any(r["status"] == "fail" for rs in report.values() for r in rs) else 0)
+
+
+if __name__ == "__main__":
+    main()
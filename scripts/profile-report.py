@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Per-app provisioning timing report from step records.
+
+    ./scripts/profile-report.py run.jsonl                    # report per app
+    ./scripts/profile-report.py run.jsonl --compare old.jsonl
+    ./scripts/dry-run.py gitlab --profile - | ./scripts/profile-report.py -
+
+Inputs are step-record JSONL files (see scripts/appstore/profile.py) or
+provisioning logs containing them. For each app the latest run is
+reported: wall time against provisioning.timeout_sec, the critical path,
+time not covered by any step, and the slowest steps with their share.
+
+Only the dry-run stand-in emits step records so far, and its durations are
+near zero because nothing executes. Until the appstore SDK on a node writes
+the same records, the report shows the format and step order, not real
+provisioning times.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from appstore import profile  # noqa: E402
+from catalog.manifest import ManifestError, load_app  # noqa: E402
+
+CATALOG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timeout_for(catalog_dir, app_id):
+    app_dir = os.path.join(catalog_dir, "apps", app_id)
+    try:
+        return load_app(app_id, app_dir)["provisioning"]["timeout_sec"]
+    except (OSError, ManifestError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("records", nargs="+", help="step-record files or logs ('-' for stdin)")
+    parser.add_argument("--compare", nargs="+", metavar="OLD", help="compare against earlier records")
+    parser.add_argument("--app", action="append", help="only these apps")
+    parser.add_argument("--top", type=int, default=5, help="slowest steps to list (default: 5)")
+    parser.add_argument("--threshold", type=float, default=1.0,
+                        help="with --compare, hide steps that moved less than this many seconds")
+    parser.add_argument("--catalog", default=CATALOG_DIR, help="catalog root, for timeouts")
+    args = parser.parse_args()
+
+    paths = ["/dev/stdin" if p == "-" else p for p in args.records]
+    runs = profile.by_app(profile.load_records(paths))
+    if args.app:
+        runs = {app: r for app, r in runs.items() if app in args.app}
+    if not runs:
+        sys.exit("no step records found")
+    if all(r["run"] == "dry-run" for records in runs.values() for r in records):
+        print("note: dry-run records only; durations are not real provisioning times", file=sys.stderr)
+
+    if args.compare:
+        old_runs = profile.by_app(profile.load_records(args.compare))
+        for app_id, records in runs.items():
+            rows = profile.compare(old_runs.get(app_id, []), records)
+            print(profile.format_compare(app_id, rows, args.threshold))
+        return
+
+    for app_id, records in runs.items():
+        report = profile.app_report(records, timeout_for(args.catalog, app_id), args.top)
+        print(profile.format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Query the precomputed catalog search index (dist/search.json).
+
+    ./scripts/search-catalog.py media server --category media --gpu nvidia
+    ./scripts/search-catalog.py --suggest jel
+    ./scripts/search-catalog.py --facets
+
+Build the index first with ./scripts/build-catalog.py.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog.search import SearchIndex  # noqa: E402
+
+CATALOG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("query", nargs="*", help="search terms")
+    parser.add_argument("--index", default=os.path.join(CATALOG_DIR, "dist", "search.json"))
+    parser.add_argument("--category", help="only apps in this category")
+    parser.add_argument("--os", help="only apps on this OS template (e.g. debian-12)")
+    parser.add_argument("--gpu", help="only apps supporting this GPU (intel, nvidia, none)")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--suggest", action="store_true", help="type-ahead suggestions for a prefix")
+    parser.add_argument("--facets", action="store_true", help="print facet counts for the matches")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    try:
+        index = SearchIndex.load(args.index)
+    except FileNotFoundError:
+        print(f"ERROR: {args.index} not found; run ./scripts/build-catalog.py first", file=sys.stderr)
+        sys.exit(1)
+
+    query = " ".join(args.query)
+    filters = {f: v for f, v in (("category", args.category), ("os", args.os), ("gpu", args.gpu)) if v}
+    if args.suggest:
+        results, counts = index.suggest(query, args.limit), {}
+    else:
+        results, counts = index.search(query, args.limit, filters)
+
+    if args.json:
+        print(json.dumps({"results": results, "facets": counts}, indent=2))
+        return
+    for r in results:
+        print(f"{r['score']:>4}  {r['id']:<24} {r['name']} {r['version']}")
+    if not results:
+        print("No matching apps")
+    if args.facets:
+        for facet, values in counts.items():
+            ranked = sorted(values.items(), key=lambda kv: (-kv[1], kv[0]))
+            print(f"{facet}: " + ", ".join(f"{v} ({n})" for v, n in ranked))
+
+
+if __name__ == "__main__":
+    main()
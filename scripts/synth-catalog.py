@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Create a synthetic catalog for benchmarking the catalog tooling.
+
+    ./scripts/synth-catalog.py /tmp/catalog-5k --apps 5000
+    ./scripts/build-catalog.py --catalog /tmp/catalog-5k --timings
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog.synthetic import make_catalog  # noqa: E402
+
+CATALOG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("dest", help="directory to create the catalog in")
+    parser.add_argument("--apps", type=int, default=1000, help="number of apps (default 1000)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default 0)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    make_catalog(CATALOG_DIR, args.dest, args.apps, args.seed)
+    print(f"Created {args.apps} apps in {args.dest} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()